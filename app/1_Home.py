@@ -1,5 +1,6 @@
 import streamlit as st
 from theme import apply_paper_theme
+from prefetch import start_prefetch
 
 
 st.set_page_config(
@@ -10,6 +11,9 @@ st.set_page_config(
 
 apply_paper_theme()
 
+# Warm all four datasets in the background so the analysis pages open on cached data
+start_prefetch()
+
 
 # masthead
 #------------------------------------------------------------------------------------
@@ -0,0 +1,177 @@
+import copy
+import threading
+import weakref
+from collections import OrderedDict
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from online_stats import OnlineStats
+from timing import span, annotate
+
+# Shared analytics per dataset version-------------------------------------------------------
+# Returns, cumulative index, volatility and correlations are computed at most once per
+# PricePanel (i.e. per dataset version) and shared by every page and session. Chart and
+# page code only reads these results; nothing here is modified after it is computed.
+# Volatility, correlation and the summary metrics come from OnlineStats, which is carried over
+# from the previous version of the same dataset and range when the new one only appends bars,
+# so a refresh that adds a day costs O(assets^2) rather than a pass over the full history.
+TRADING_DAYS = 252
+
+
+# Rolling-window correlation kernel------------------------------------------------------------
+# Windowed sums come from differences of cumulative sums of returns and of their pairwise
+# products, so every window costs O(assets^2) regardless of its length instead of one
+# `.corr()` call per window. Returns are centered first to keep the differences accurate.
+# The result is a (window end date) x asset x asset float32 array. It is filled a chunk of
+# window ends at a time, with the covariance turned into correlation in place, so temporaries
+# stay within a few ROLLING_CHUNK_BYTES and peak memory stays close to the result's size.
+# Each chunk starts from a direct product of its first window, so the running sums do not
+# drift over a long history.
+ROLLING_CHUNK_BYTES = 32 * 2 ** 20
+
+
+class RollingCorrelation:
+    def __init__(self, dates, assets, values, window):
+        values.flags.writeable = False
+        self.dates = dates
+        self.assets = list(assets)
+        self.values = values
+        self.window = window
+
+    def at(self, date):
+        i = self.dates.get_indexer([pd.Timestamp(date)], method='pad')[0]
+        return pd.DataFrame(self.values[max(i, 0)], index=self.assets, columns=self.assets)
+
+    # Mean off-diagonal correlation per window
+    def average(self):
+        k = len(self.assets)
+        off_diagonal = (np.nansum(self.values, axis=(1, 2), dtype=np.float64) - k) / (k * (k - 1))
+        return pd.Series(off_diagonal, index=self.dates)
+
+
+def rolling_correlation(returns, window=60, step=1):
+    x = returns.to_numpy(dtype=np.float64)
+    n, k = x.shape
+    if n < window:
+        return RollingCorrelation(returns.index[:0], returns.columns, np.empty((0, k, k), dtype=np.float32), window)
+
+    x = x - x.mean(axis=0)
+    s1 = np.vstack([np.zeros((1, k)), np.cumsum(x, axis=0)])
+    ends = np.arange(window, n + 1, step)
+    corr = np.empty((len(ends), k, k), dtype=np.float32)
+
+    # Window ends per chunk: each holds about `step` rows of k x k products per end
+    per_chunk = max(1, ROLLING_CHUNK_BYTES // (8 * k * k * step))
+    for c in range(0, len(ends), per_chunk):
+        chunk = ends[c:c + per_chunk]
+        first = chunk[0]
+        head = x[first - window:first]
+        sxy = np.empty((len(chunk), k, k))
+        sxy[0] = head.T @ head
+        if len(chunk) > 1:
+            # Products of the rows entering minus those leaving, accumulated row by row
+            rows = np.arange(first, chunk[-1])
+            delta = x[rows, :, None] * x[rows, None, :]
+            delta -= x[rows - window, :, None] * x[rows - window, None, :]
+            np.cumsum(delta, axis=0, out=delta)
+            np.add(sxy[0], delta[chunk[1:] - first - 1], out=sxy[1:])
+            del delta
+
+        sx = s1[chunk] - s1[chunk - window]
+        sxy -= sx[:, :, None] * sx[:, None, :] / window
+        sxy /= window - 1
+        scale = np.sqrt(np.clip(np.diagonal(sxy, axis1=1, axis2=2), 0, None))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sxy /= scale[:, :, None]
+            sxy /= scale[:, None, :]
+        np.clip(sxy, -1.0, 1.0, out=corr[c:c + len(chunk)])
+    return RollingCorrelation(returns.index[ends - 1], returns.columns, corr, window)
+
+
+class Analytics:
+    # `close` is a date x asset close matrix; `version` identifies the data it came from
+    def __init__(self, close, stats=None, version=None):
+        self.close = close
+        self.version = version
+        self._stats = stats
+        self._rolling = {}
+        self._rolling_lock = threading.Lock()
+
+    @cached_property
+    def stats(self):
+        if self._stats is not None:
+            return self._stats
+        return OnlineStats.from_close(self.close, trading_days=TRADING_DAYS)
+
+    # Daily returns on the dates every asset has a price for
+    @cached_property
+    def returns(self):
+        return self.close.pct_change(fill_method=None).dropna()
+
+    # Growth of 100 invested on the first common date
+    @cached_property
+    def cumulative(self):
+        return (1 + self.returns).cumprod() * 100
+
+    # Each asset's close indexed to 100 at its own first bar
+    @cached_property
+    def normalized(self):
+        close = self.close
+        first = close.bfill().iloc[0]
+        return close / first * 100
+
+    @cached_property
+    def volatility(self):
+        return self.stats.volatility
+
+    # Correlation of daily returns
+    @cached_property
+    def correlation(self):
+        return self.stats.correlation
+
+    # Rolling correlation of daily returns, computed once per window length
+    def rolling_correlation(self, window=60):
+        with self._rolling_lock:
+            if window not in self._rolling:
+                self._rolling[window] = rolling_correlation(self.returns, window)
+            return self._rolling[window]
+
+    # Correlation of price levels
+    @cached_property
+    def price_correlation(self):
+        return self.close.corr()
+
+
+_analytics = weakref.WeakKeyDictionary()
+_analytics_lock = threading.Lock()
+
+# Latest OnlineStats per (dataset, range start, fill): a range query of a refreshed dataset
+# that only gained bars at its end extends the state of the same query on the previous version
+ONLINE_STATES = 32
+_online = OrderedDict()
+
+def _online_stats(panel, fill, close):
+    key = (panel.name, panel.dates[0] if len(panel.dates) else None, fill)
+    previous = _online.get(key)
+    if previous is not None and previous.can_extend(close):
+        # Extend a copy so analytics of the previous version keep their numbers
+        stats = copy.deepcopy(previous).extend(close)
+    else:
+        stats = OnlineStats.from_close(close, trading_days=TRADING_DAYS)
+    if panel.name is not None:
+        _online[key] = stats
+        _online.move_to_end(key)
+        while len(_online) > ONLINE_STATES:
+            _online.popitem(last=False)
+    return stats
+
+# Analytics for a panel's closes; with fill=True gaps are forward- then back-filled------------
+def get_analytics(panel, fill=False):
+    with span('compute', 'analytics'), _analytics_lock:
+        per_panel = _analytics.setdefault(panel, {})
+        annotate('hit' if fill in per_panel else 'miss')
+        if fill not in per_panel:
+            close = panel.field('Close')
+            close = close.ffill().bfill() if fill else close
+            per_panel[fill] = Analytics(close, _online_stats(panel, fill, close), (panel.version, fill))
+        return per_panel[fill]
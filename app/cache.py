@@ -0,0 +1,129 @@
+import time
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from timing import span, annotate
+
+logger = logging.getLogger(__name__)
+
+# TTL cache with stale-while-revalidate and LRU eviction-----------------------------------
+# - A missing entry is computed under a per-key lock, so concurrent callers wait for the
+#   one fetch in flight instead of starting their own.
+# - An entry older than its TTL keeps being served while a single background thread
+#   reloads it; the old value stays in place if the reload fails, and the next reload waits
+#   REFRESH_RETRY seconds, so reruns do not hit a failing upstream every time.
+# - At most `maxsize` entries are kept; the least recently used one is evicted first.
+# - A partial result (a frame whose attrs list assets in 'partial') goes stale after
+#   PARTIAL_TTL instead, so what failed to load is fetched again soon.
+PARTIAL_TTL = 60
+REFRESH_RETRY = 30
+
+
+def _is_partial(value):
+    return bool(getattr(value, 'attrs', {}).get('partial'))
+
+
+class _Entry:
+    __slots__ = ('value', 'loaded_at', 'ttl', 'refreshing', 'retry_after')
+
+    def __init__(self, value, ttl):
+        self.value = value
+        self.loaded_at = time.monotonic()
+        self.ttl = ttl
+        self.refreshing = False
+        self.retry_after = 0.0
+
+
+class TTLCache:
+    def __init__(self, ttl, maxsize=32, name=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = _Entry(value, min(self.ttl, PARTIAL_TTL) if _is_partial(value) else self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+
+    def _refresh(self, key, loader):
+        try:
+            self._store(key, loader())
+        except Exception:
+            logger.exception("Background refresh of %s failed, serving stale data", self.name)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+                    entry.retry_after = time.monotonic() + REFRESH_RETRY
+
+    def _expired(self, entry):
+        return time.monotonic() - entry.loaded_at > entry.ttl
+
+    # With stale=False an expired entry is reloaded before returning instead of being served
+    # while a background reload runs
+    def get(self, key, loader, stale=True):
+        entry = self._lookup(key)
+        if entry is None or not stale and self._expired(entry):
+            with self._key_lock(key):
+                entry = self._lookup(key)
+                if entry is None or not stale and self._expired(entry):
+                    annotate('miss')
+                    value = loader()
+                    self._store(key, value)
+                    return value
+
+        with self._lock:
+            start_refresh = (
+                self._expired(entry) and not entry.refreshing and time.monotonic() >= entry.retry_after
+            )
+            if start_refresh:
+                entry.refreshing = True
+        annotate('stale' if start_refresh else 'hit')
+        if start_refresh:
+            threading.Thread(
+                target=self._refresh, args=(key, loader), name=f'refresh-{self.name}', daemon=True
+            ).start()
+        return entry.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+# Decorator used by the get_* loaders in place of st.cache_data----------------------------
+def ttl_cache(ttl, maxsize=32):
+    def decorator(func):
+        cache = TTLCache(ttl, maxsize=maxsize, name=func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with span('fetch', func.__name__):
+                return cache.get(key, functools.partial(func, *args, **kwargs))
+
+        wrapper.cache = cache
+        wrapper.clear = cache.clear
+        return wrapper
+    return decorator
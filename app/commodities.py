@@ -1,10 +1,13 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import datetime as dt
-import streamlit as st
+from market_data import load_universe, HISTORY_START, history_end, INTRADAY_INTERVAL, intraday_start, index_period
+from cache import ttl_cache
+from panel import shared_panel
+from analytics import get_analytics
+from downsample import downsample
+from figures import new_figure
+import vega
+from timing import timed
 
 # Commodity tickers----------------------------------------------------------------
 commodities = {
@@ -20,61 +23,70 @@ commodities = {
     'USD Dollar Index': 'DX-Y.NYB'
 }
 
-# Fetch commodity data from yfinance (only 2025), cached--------------------------------
-@st.cache_data(show_spinner=False)
+# Futures trade nearly around the clock, so refresh often
+CACHE_TTL = 15 * 60
+INTRADAY_TTL = 60
+
+# Fetch commodity history from yfinance (pages query date ranges of it), cached--------------
+@ttl_cache(ttl=CACHE_TTL)
 def get_commodities():
-    start = dt.date(2025, 1, 2)
-    end = dt.date(2025, 12, 31)
-
-    data = {}
-    for name, ticker in commodities.items():
-        df = yf.download(ticker, start=start, end=end, auto_adjust=True)
-        df.columns = df.columns.droplevel(1) if isinstance(df.columns, pd.MultiIndex) else df.columns
-        df['Ticker'] = ticker
-        df['Name'] = name
-        data[name] = df
-    return pd.concat(data)
-
-# Compute returns, volatility, and trend------------------------------------------------
-def compute_summary(data):
-    summary = []
-
-    for name in commodities.keys():
-        df = data.loc[name]
-        df['Return'] = df['Close'].pct_change()
-
-        one_year = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
-        one_month = df['Close'].pct_change(21).iloc[-1]
-        three_month = df['Close'].pct_change(63).iloc[-1]
-        six_month = df['Close'].pct_change(126).iloc[-1]
-
-        volatility = df['Return'].std() * np.sqrt(252)
-
-        df['MA50'] = df['Close'].rolling(50).mean()
-        df['MA200'] = df['Close'].rolling(200).mean()
-        trend = "Uptrend" if df['MA50'].iloc[-1] > df['MA200'].iloc[-1] else "Downtrend"
-
-        summary.append([
-            name,
-            f"{one_month:.2%}",
-            f"{three_month:.2%}",
-            f"{six_month:.2%}",
-            f"{one_year:.2%}",
-            f"{volatility:.2%}",
-            trend
-        ])
-
-    columns = ["Commodity", "1M Return", "3M Return", "6M Return", "1Y Return", "Volatility", "Trend"]
-    return pd.DataFrame(summary, columns=columns)
+    return load_universe(commodities, HISTORY_START, history_end(), label='Name', dataset='commodities')
+
+# Shared read-only panel of the commodity data (date x asset views, no per-session copy)
+def get_commodity_panel():
+    return shared_panel(get_commodities)
+
+# Intraday bars for the last few days, cached----------------------------------------------
+@ttl_cache(ttl=INTRADAY_TTL)
+def get_commodities_intraday(interval=INTRADAY_INTERVAL):
+    return load_universe(commodities, intraday_start(), history_end(), label='Name', interval=interval, dataset='commodities')
+
+def get_commodity_intraday_panel():
+    return shared_panel(get_commodities_intraday)
+
+# Shared analytics (returns, normalized prices, correlations) for the commodity panel
+def prepare_data(panel):
+    return get_analytics(panel)
+
+# Return horizons in trading days for the summary table
+RETURN_WINDOWS = {"1M Return": 21, "3M Return": 63, "6M Return": 126}
+
+# Returns, volatility, and trend for every asset at once---------------------------------
+# Read from the analytics' running state (OnlineStats), so a refresh that appends a bar does
+# not pass over the history again. Each asset is measured on its own bars, so calendars that
+# differ between assets (Bitcoin trades weekends) do not shift the return horizons. Values
+# stay numeric; see format_summary.
+@timed('compute')
+def compute_summary(analytics):
+    stats = analytics.stats
+    summary = pd.DataFrame({"Commodity": stats.assets})
+    for label, window in RETURN_WINDOWS.items():
+        summary[label] = stats.trailing_return(window).to_numpy()
+    # First to last bar of the selected range, however long it is
+    summary["Period Return"] = stats.total_return.to_numpy()
+    summary["Volatility"] = stats.asset_volatility.to_numpy()
+
+    ma50 = stats.moving_average(50).to_numpy()
+    ma200 = stats.moving_average(200).to_numpy()
+    summary["Trend"] = np.where(ma50 > ma200, "Uptrend", "Downtrend")
+    return summary
+
+# Percent formatting applied only at display time----------------------------------------
+def format_summary(summary):
+    percent_columns = [*RETURN_WINDOWS, "Period Return", "Volatility"]
+    return summary.style.format({column: "{:.2%}" for column in percent_columns})
 
 # Commodity correlation heatmap---------------------------------------------------------
-def commodity_correlation(data, figsize=(12, 8)):
-    pivoted = data.reset_index().pivot(index="Date", columns="Name", values="Close")
-    corr = pivoted.corr()
+def commodity_correlation(analytics, figsize=(12, 8), period=None):
+    corr = analytics.price_correlation
+    title = f"Commodity Correlation Heatmap ({period or index_period(analytics.close.index)})"
+    if vega.ENABLED:
+        return vega.heatmap(corr, title, figsize)
+    import seaborn as sns
 
     mask = np.triu(np.ones_like(corr, dtype=bool))
 
-    plt.figure(figsize=figsize)
+    fig, ax = new_figure(figsize=figsize)
     sns.heatmap(
         corr,
         annot=True,
@@ -82,49 +94,67 @@ def commodity_correlation(data, figsize=(12, 8)):
         cmap="coolwarm",
         linewidths=.7,
         mask=mask,
-        cbar_kws={"shrink": .8}
+        cbar_kws={"shrink": .8},
+        ax=ax
     )
-    plt.title("Commodity Correlation Heatmap (2025)")
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    plt.tight_layout()
-    plt.show()
-    return corr
-
-# Price charts---------------------------------------------------------------------------
-def plot_price(data):
-    for name in commodities.keys():
-        df = data.loc[name]
-        plt.figure(figsize=(12, 5))
-        plt.plot(df.index, df['Close'])
-        plt.title(f"{name} - Price Chart (2025)")
-        plt.ylabel("Price")
-        plt.grid(True)
-        plt.show()
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.tick_params(axis='y', labelrotation=0)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    return fig
+
+# Price charts, one figure per commodity--------------------------------------------------
+def price_chart(panel, name, period=None):
+    close = downsample(panel.asset(name)['Close'])
+    period = period or index_period(panel.dates)
+    if vega.ENABLED:
+        return vega.line_chart(close.rename(name), f"{name} - Price Chart ({period})", None, "Price", (12, 5))
+    fig, ax = new_figure(figsize=(12, 5))
+    ax.plot(close.index, close)
+    ax.set_title(f"{name} - Price Chart ({period})")
+    ax.set_ylabel("Price")
+    ax.grid(True)
+    return fig
+
+def plot_price(panel, period=None):
+    return [price_chart(panel, name, period) for name in panel.assets]
 
 # Normalized price comparison-----------------------------------------------------------
-def plot_normalized(data):
-    pivoted = data.reset_index().pivot(index="Date", columns="Name", values="Close")
-    norm = (pivoted / pivoted.apply(lambda x: x.dropna().iloc[0])) * 100
-
-    plt.figure(figsize=(12, 6))
-    for name in commodities.keys():
-        plt.plot(norm.index, norm[name], label=name)
-    plt.title("Normalized Comparison (Indexed to 100, 2025)")
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-
-# Moving averages / trend signals-------------------------------------------------------
-def plot_moving_averages(data):
-    for name in commodities.keys():
-        df = data.loc[name]
-        df['MA50'] = df['Close'].rolling(50).mean()
-        df['MA200'] = df['Close'].rolling(200).mean()
-
-        plt.figure(figsize=(12, 6))
-        plt.plot(df.index, df['Close'], label="Close Price")
-        plt.plot(df.index, df['MA50'], label="50-day MA")
-        plt.plot(df.index, df['MA200'], label="200-day MA")
-        plt.tit
-
+def plot_normalized(analytics, period=None):
+    norm = analytics.normalized
+    period = period or index_period(norm.index)
+    if vega.ENABLED:
+        return vega.line_chart(norm, f"Normalized Comparison (Indexed to 100, {period})", None)
+
+    fig, ax = new_figure(figsize=(12, 6))
+    for name in norm.columns:
+        line = downsample(norm[name])
+        ax.plot(line.index, line, label=name)
+    ax.set_title(f"Normalized Comparison (Indexed to 100, {period})")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+# Moving averages / trend signals, one figure per commodity--------------------------------
+def moving_average_chart(panel, name):
+    close = panel.asset(name)['Close']
+    ma50 = downsample(close.rolling(50).mean())
+    ma200 = downsample(close.rolling(200).mean())
+    close = downsample(close)
+    if vega.ENABLED:
+        lines = pd.concat({"Close Price": close, "50-day MA": ma50, "200-day MA": ma200}, axis=1)
+        return vega.line_chart(lines, f"{name} - Moving Averages", None)
+
+    fig, ax = new_figure(figsize=(12, 6))
+    ax.plot(close.index, close, label="Close Price")
+    ax.plot(ma50.index, ma50, label="50-day MA")
+    ax.plot(ma200.index, ma200, label="200-day MA")
+    ax.set_title(f"{name} - Moving Averages")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+def plot_moving_averages(panel):
+    return [moving_average_chart(panel, name) for name in panel.assets]
@@ -0,0 +1,44 @@
+import streamlit as st
+from market_data import DEFAULT_START, DEFAULT_END
+
+# Date-range selector over the in-memory history------------------------------------------
+# Defaults to the dashboard's 2025 window, clipped to the dates actually available.
+def date_range_selector(dates, key=None):
+    first, last = dates[0].date(), dates[-1].date()
+    default_start = min(max(DEFAULT_START, first), last)
+    default_end = max(min(DEFAULT_END, last), default_start)
+
+    start, end = st.slider(
+        "Date range:",
+        min_value=first,
+        max_value=last,
+        value=(default_start, default_end),
+        format="D MMM YYYY",
+        key=key
+    )
+    return start, end
+
+# Notice for a picked range that holds no data (a weekend, or no release in between)------
+# Returns True, after showing it, when `dates` (the range's index) is empty; the page then
+# leaves out the range's charts.
+def empty_range_notice(dates, start, end):
+    if len(dates):
+        return False
+    st.info(f"There is no data between {start:%d %b %Y} and {end:%d %b %Y}. Pick a wider range.")
+    return True
+
+# Notice for assets that could not be loaded or refreshed (a partial dataset)--------------
+# `status` is a loaded frame's attrs['status'] (or a panel's .status); nothing is shown when
+# every asset loaded.
+def data_status_notice(status):
+    stale = [f"{name} ({entry['symbol']})" for name, entry in (status or {}).items() if entry['state'] == 'stale']
+    failed = [f"{name} ({entry['symbol']})" for name, entry in (status or {}).items() if entry['state'] == 'failed']
+    if not stale and not failed:
+        return
+    lines = []
+    if failed:
+        lines.append(f"No data could be loaded for {', '.join(failed)}; it is left out below.")
+    if stale:
+        lines.append(f"{', '.join(stale)} could not be updated; showing the last data available.")
+    lines.append("Retrying in the background.")
+    st.warning(' '.join(lines))
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+# Downsampling in front of the line charts-----------------------------------------------------
+# A chart never needs more points than it has horizontal pixels, so every line is reduced
+# to at most MAX_POINTS before it reaches matplotlib, however many bars the range holds.
+# Points are picked with Largest-Triangle-Three-Buckets, which keeps the visually
+# significant ones.
+MAX_POINTS = 1500
+
+
+def _as_xy(series):
+    series = series.dropna()
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else series.index.to_numpy()
+    return np.asarray(x, dtype=np.float64), series.to_numpy(dtype=np.float64), series
+
+
+def lttb_indices(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket edges over the interior points; first and last points are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# Reduce a Series to at most `max_points` (its index order is kept)----------------------------
+def downsample(series, max_points=MAX_POINTS):
+    x, y, series = _as_xy(series)
+    if len(series) <= max_points:
+        return series
+    return series.iloc[lttb_indices(x, y, max_points)]
+
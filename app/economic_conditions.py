@@ -1,9 +1,16 @@
-from fredapi import Fred
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
-import datetime as dt
-import streamlit as st
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from cache import ttl_cache, TTLCache
+from providers import get_provider, UpstreamError
+from fetch import fetch_series
+from market_data import HISTORY_START, history_end, ticker_status, with_status, period_label, index_period
+from figure_cache import render_figure
+from figures import new_figure
+import vega
+
+logger = logging.getLogger(__name__)
 
 # Indicators mapping----------------------------------------------------------------
 indicators = {
@@ -18,53 +25,92 @@ indicators = {
     "Retail Sales": "RSXFS"
 }
 
-# Fetch economic snapshot from FRED, restricted to 2025, cached--------------------------------
-@st.cache_data(show_spinner=False)
+# Mostly monthly series, revised a few times a month at most
+CACHE_TTL = 12 * 60 * 60
+
+# Concurrent FRED requests (kept low to stay under the API rate limit)------------------------
+FRED_MAX_WORKERS = 4
+
+# Each series is cached on its own, so reloading a snapshot that was missing a series only
+# fetches that one again
+_series = TTLCache(CACHE_TTL, maxsize=64, name='fred_series')
+
+def _fetch_indicator(provider, series_id, start, end):
+    key = (provider.name, series_id, str(start), str(end))
+    return _series.get(key, lambda: fetch_series(provider, series_id, start, end), stale=False)
+
+# Fetch economic history from FRED (pages query date ranges of it), cached----------------------
+# Indicators that could not be fetched are left out and reported in attrs['status'], as
+# load_universe does for tickers.
+@ttl_cache(ttl=CACHE_TTL)
 def get_economic_snapshot():
-    fred = Fred(api_key=st.secrets['FRED_API_KEY'])
-    data = pd.DataFrame()
+    provider = get_provider()
+
+    start = HISTORY_START
+    end = history_end()
 
-    start = dt.date(2025, 1, 1)
-    end = dt.date(2025, 12, 31)
+    with ThreadPoolExecutor(max_workers=FRED_MAX_WORKERS) as pool:
+        futures = {
+            name: pool.submit(_fetch_indicator, provider, series_id, start, end)
+            for name, series_id in indicators.items()
+        }
+        series, status = {}, {}
+        for name, future in futures.items():
+            try:
+                series[name] = future.result()
+                status[name] = ticker_status(indicators[name])
+            except Exception as e:
+                logger.warning("FRED series %s failed: %r", indicators[name], e)
+                status[name] = ticker_status(indicators[name], 'failed', f'{type(e).__name__}: {e}')
 
-    for name, series_id in indicators.items():
-        series = fred.get_series(series_id)
-        series = series.loc[start:end]  # only 2025
-        data[name] = series
+    if not series:
+        raise UpstreamError('No FRED series could be fetched')
 
+    # Merge in one pass, on the first indicator's (monthly) dates as before
+    first = next(iter(series.values()))
+    data = pd.concat(series, axis=1).reindex(first.index)
     data.index = pd.to_datetime(data.index)
-    return data
+    return with_status(data, status)
 
 # Plot raw indicator time series----------------------------------------------------------------
-def economic_indicators_raw(data, indicator):
-    fig, ax = plt.subplots(figsize=(10, 4))
+def economic_indicators_raw(data, indicator, period=None):
+    title = f'{indicator} - {period or index_period(data.index)}'
+    if vega.ENABLED:
+        return vega.line_chart(data[indicator], title, 'Date', indicator, (10, 4))
+    fig, ax = new_figure(figsize=(10, 4))
     ax.plot(data.index, data[indicator], color='tab:blue')
-    ax.set_title(f'{indicator} - 2025')
+    ax.set_title(title)
     ax.set_xlabel('Date')
     ax.set_ylabel(indicator)
     ax.grid(True)
     return fig
 
 # Plot normalized indicator comparison--------------------------------------------------------
-def economic_indicators_normalized(data):
+def economic_indicators_normalized(data, period=None):
     normalized_data = data / data.iloc[0] * 100
+    title = f'Normalized Economic Indicators (Indexed to 100, {period or index_period(data.index)})'
+    if vega.ENABLED:
+        return vega.line_chart(normalized_data, title, None, figsize=(14, 7))
 
-    fig, ax = plt.subplots(figsize=(14, 7))
+    fig, ax = new_figure(figsize=(14, 7))
     for col in normalized_data.columns:
         ax.plot(normalized_data.index, normalized_data[col], label=col)
-    ax.set_title('Normalized Economic Indicators (Indexed to 100, 2025)')
+    ax.set_title(title)
     ax.legend(loc='upper left')
     ax.grid(True)
     return fig
 
-# Run analysis and return raw + normalized data------------------------------------------------
-def run_economic_analysis():
-    data = get_economic_snapshot()
+# Run analysis and return raw data + the rendered normalized chart (PNG, cached)----------------
+# A range without observations gets no chart (normalized is None).
+def run_economic_analysis(start=None, end=None):
+    data = get_economic_snapshot().loc[start:end]
     data_columns = data.columns.tolist()
-    normalized = economic_indicators_normalized(data)
+    period = period_label(start or data.index[0], end or data.index[-1]) if len(data) else None
+    normalized = render_figure(economic_indicators_normalized, data, period) if len(data) else None
     return {
         'data': data,
         'columns': data_columns,
+        'period': period,
         'normalized': normalized
     }
 
@@ -0,0 +1,164 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future
+from timing import span, annotate
+from providers import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+# Upstream fetch layer---------------------------------------------------------------------
+# Every call to the provider (Yahoo/FRED, or the fixture stub) goes through here:
+#   - single flight: a request for a (ticker, range) or (series, range) already being fetched
+#     by another thread waits for that fetch and shares its result (or its error) instead of
+#     sending its own; a batch only downloads the tickers nobody else is fetching;
+#   - retries: a call that failed with UpstreamError or a network/HTTP error is retried up to
+#     FETCH_ATTEMPTS times in all, sleeping a random 0..min(FETCH_BACKOFF_CAP,
+#     FETCH_BACKOFF * 2^attempt) seconds in between ("full jitter"), so sessions that failed
+#     together do not retry together; any other error (a bug, a rejected API key) is raised
+#     at once;
+#   - at most FETCH_CONCURRENCY provider calls run at once across the process; a call sleeping
+#     before its retry does not hold a slot.
+FETCH_CONCURRENCY = int(os.environ.get('FETCH_CONCURRENCY', 4))
+FETCH_ATTEMPTS = int(os.environ.get('FETCH_ATTEMPTS', 4))
+FETCH_BACKOFF = float(os.environ.get('FETCH_BACKOFF', 0.5))
+FETCH_BACKOFF_CAP = float(os.environ.get('FETCH_BACKOFF_CAP', 8.0))
+
+_slots = threading.BoundedSemaphore(FETCH_CONCURRENCY)
+
+# Errors worth another attempt; socket, urllib, requests and curl_cffi errors are all OSErrors
+RETRYABLE = (UpstreamError, OSError)
+
+
+class FetchStats:
+    __slots__ = ('requests', 'coalesced', 'calls', 'retries', 'failures', 'active', 'peak', '_lock')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0   # tickers/series asked for
+        self.coalesced = 0  # ... of which were served by another thread's fetch
+        self.calls = 0      # provider calls made, retries included
+        self.retries = 0
+        self.failures = 0   # calls that still failed after the last attempt
+        self.active = 0
+        self.peak = 0       # most provider calls in flight at once
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+            self.peak = max(self.peak, self.active)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: getattr(self, name) for name in self.__slots__ if name != '_lock'}
+
+
+stats = FetchStats()
+
+
+def backoff_delay(attempt):
+    return random.uniform(0, min(FETCH_BACKOFF_CAP, FETCH_BACKOFF * 2 ** attempt))
+
+
+# One provider call under the concurrency cap, retried with jittered backoff
+def call_upstream(func, *args, label=None):
+    for attempt in range(FETCH_ATTEMPTS):
+        with _slots:
+            stats.add(calls=1, active=1)
+            try:
+                with span('fetch', label or func.__name__):
+                    return func(*args)
+            except RETRYABLE as e:
+                error = e
+            except Exception:
+                stats.add(failures=1)
+                raise
+            finally:
+                stats.add(active=-1)
+        if attempt + 1 < FETCH_ATTEMPTS:
+            delay = backoff_delay(attempt)
+            logger.warning("%s failed (%r), retry %d in %.2fs", label or func.__name__, error, attempt + 1, delay)
+            stats.add(retries=1)
+            time.sleep(delay)
+    stats.add(failures=1)
+    raise error
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    # Split keys into (futures this caller must complete, futures someone else completes)
+    def claim(self, keys):
+        mine, theirs = {}, {}
+        with self._lock:
+            for key in keys:
+                future = self._flights.get(key)
+                if future is None:
+                    future = self._flights[key] = Future()
+                    mine[key] = future
+                else:
+                    theirs[key] = future
+        return mine, theirs
+
+    def finish(self, key):
+        with self._lock:
+            self._flights.pop(key, None)
+
+    # result of func() for one key, computed once however many threads ask at the same time
+    def do(self, key, func):
+        mine, theirs = self.claim([key])
+        if theirs:
+            stats.add(requests=1, coalesced=1)
+            annotate('coalesced')
+            return theirs[key].result()
+        stats.add(requests=1)
+        future = mine[key]
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self.finish(key)
+        return future.result()
+
+
+_flights = SingleFlight()
+
+
+# {symbol: frame} for one range; tickers already in flight are awaited, the rest downloaded
+# in one batch
+def fetch_prices(provider, symbols, start, end, interval='1d'):
+    keys = {symbol: ('prices', provider.name, symbol, str(start), str(end), interval) for symbol in symbols}
+    mine, theirs = _flights.claim(keys.values())
+    stats.add(requests=len(symbols), coalesced=len(theirs))
+    if theirs:
+        annotate('coalesced' if not mine else f'{len(theirs)}/{len(symbols)} coalesced')
+
+    batch = [symbol for symbol in symbols if keys[symbol] in mine]
+    if batch:
+        try:
+            frames = call_upstream(provider.download, batch, start, end, interval,
+                                   label=f'download {len(batch)} symbols')
+            for symbol in batch:
+                mine[keys[symbol]].set_result(frames.get(symbol))
+        except BaseException as e:
+            for symbol in batch:
+                mine[keys[symbol]].set_exception(e)
+        finally:
+            for symbol in batch:
+                _flights.finish(keys[symbol])
+
+    return {symbol: (mine.get(keys[symbol]) or theirs[keys[symbol]]).result() for symbol in symbols}
+
+
+def fetch_series(provider, series_id, start, end):
+    key = ('fred', provider.name, series_id, str(start), str(end))
+    return _flights.do(key, lambda: call_upstream(provider.fred_series, series_id, start, end, label=series_id))
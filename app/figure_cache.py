@@ -0,0 +1,164 @@
+import io
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+from figures import release
+from timing import span, annotate
+import vega
+
+# Rendered-figure cache---------------------------------------------------------------------------
+# Every widget interaction reruns the whole page script, but most charts on a page do not depend
+# on the widget that changed. Charts are therefore rendered once to PNG/SVG bytes and kept here,
+# keyed by (chart function, version of each data argument, other arguments, format). With the
+# client-side backend (vega.ENABLED) the cached bytes are the chart's Vega-Lite spec as JSON.
+#   - PricePanel and Analytics carry a `version` token, new for every dataset version;
+#   - DataFrames and Series are versioned by a hash of their contents;
+#   - anything else (names, dates, windows) is used as-is.
+# An unchanged chart is served straight from the bytes without calling matplotlib. Entries are
+# evicted least recently used first once their total size passes MAX_BYTES.
+MAX_BYTES = 64 * 1024 * 1024
+
+# Same output settings as st.pyplot, so cached charts look the same as live ones
+SAVEFIG = {'bbox_inches': 'tight', 'dpi': 200}
+
+
+# Render a figure (or a list of figures) to bytes and release it; specs are serialized
+def render_bytes(fig, fmt='png'):
+    if isinstance(fig, list):
+        return [render_bytes(one, fmt) for one in fig]
+    if isinstance(fig, dict):
+        return json.dumps(fig, separators=(',', ':')).encode('utf-8')
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, **SAVEFIG)
+        return buffer.getvalue()
+    finally:
+        release(fig)
+
+
+def _size(image):
+    return sum(map(len, image)) if isinstance(image, list) else len(image)
+
+
+def data_version(value):
+    version = getattr(value, 'version', None)
+    if version is not None:
+        return (type(value).__name__, version)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        content = int(pd.util.hash_pandas_object(value).sum())
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return (type(value).__name__, value.shape, columns, content)
+    return value
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(func, args, kwargs, fmt):
+        return (
+            func.__module__,
+            func.__qualname__,
+            tuple(data_version(arg) for arg in args),
+            tuple(sorted((name, data_version(arg)) for name, arg in kwargs.items())),
+            fmt
+        )
+
+    def _lookup(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return image
+
+    def _store(self, key, image):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= _size(self._entries.pop(key))
+            self._entries[key] = image
+            self.nbytes += _size(image)
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                evicted, old = self._entries.popitem(last=False)
+                self.nbytes -= _size(old)
+                self._key_locks.pop(evicted, None)
+
+    # Rendered bytes of func(*args, **kwargs); func returns a figure (or a list of figures)
+    def render(self, func, *args, fmt='png', **kwargs):
+        with span('render', func.__name__):
+            key = self.key(func, args, kwargs, fmt)
+            image = self._lookup(key)
+            if image is not None:
+                annotate('hit')
+                return image
+
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                image = self._lookup(key)
+                if image is None:
+                    annotate('miss')
+                    with self._lock:
+                        self.misses += 1
+                    image = render_bytes(func(*args, **kwargs), fmt)
+                    self._store(key, image)
+                else:
+                    annotate('hit')
+                return image
+
+    # Rendered bytes for many (func, args, kwargs) jobs; the ones not cached are handed to
+    # `renderer` together, which returns their bytes in the same order
+    def render_many(self, jobs, fmt, renderer):
+        with span('render', ', '.join(func.__name__ for func, _, _ in jobs)):
+            keys = [self.key(func, args, kwargs, fmt) for func, args, kwargs in jobs]
+            images = [self._lookup(key) for key in keys]
+            missing = [i for i, image in enumerate(images) if image is None]
+            annotate(f'{len(jobs) - len(missing)}/{len(jobs)} hit' if 0 < len(missing) < len(jobs) else 'miss' if missing else 'hit')
+            if missing:
+                with self._lock:
+                    self.misses += len(missing)
+                for i, image in zip(missing, renderer([jobs[i] for i in missing])):
+                    self._store(keys[i], image)
+                    images[i] = image
+            return images
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self.nbytes = 0
+
+
+figure_cache = FigureCache()
+
+
+def render_figure(func, *args, fmt='png', **kwargs):
+    return figure_cache.render(func, *args, fmt=fmt, **kwargs)
+
+
+# Draw rendered chart bytes on the page (PNG, SVG markup or a Vega-Lite spec)
+def show_rendered(image, fmt='png'):
+    import streamlit as st
+
+    if vega.ENABLED:
+        st.vega_lite_chart(json.loads(image), width='stretch')
+        return
+    if fmt == 'svg':
+        image = image.decode('utf-8')
+    st.image(image, width='stretch')
+
+
+# Draw a chart on the page from the cache
+def show_figure(func, *args, fmt='png', **kwargs):
+    show_rendered(render_figure(func, *args, fmt=fmt, **kwargs), fmt)
@@ -0,0 +1,48 @@
+import weakref
+from timing import span
+
+# Figure lifecycle----------------------------------------------------------------------------
+# Charts are drawn on standalone Figure objects rather than through pyplot. They never enter
+# pyplot's global figure registry and share no "current figure/axes" state, so sessions can
+# render in parallel threads without drawing on each other's charts, and a figure's memory is
+# released once it has been shown instead of piling up until plt.close().
+#   new_figure()  figure + axes for a chart function to draw on and return
+#   show()        draws a figure on the page, then releases it (Vega-Lite specs from the
+#                 client-side backend are handed to the browser as they are)
+#   release()     drops a figure's artists once it has been rendered
+# matplotlib itself is imported on the first new_figure(), so pages served from the figure
+# cache or by the Vega-Lite backend never load it.
+_live = weakref.WeakSet()
+
+
+def new_figure(figsize=None, **subplots):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    _live.add(fig)
+    return fig, fig.subplots(**subplots)
+
+
+def release(fig):
+    fig.clear()
+    _live.discard(fig)
+
+
+# Figures created and not yet released (or garbage-collected); flat under a steady load
+def open_figures():
+    return len(_live)
+
+
+def show(fig):
+    import streamlit as st
+
+    if isinstance(fig, dict):
+        st.vega_lite_chart(fig, width='stretch')
+        return
+    try:
+        with span('render', 'st.pyplot'):
+            st.pyplot(fig)
+    finally:
+        release(fig)
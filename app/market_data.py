@@ -0,0 +1,223 @@
+import os
+import logging
+import datetime as dt
+import threading
+import numpy as np
+import pandas as pd
+from price_store import PriceStore, STORE_DIR
+from providers import get_provider, UpstreamError
+from timing import span
+from fetch import fetch_prices
+
+# Shared loader for the commodity, region and sector universes----------------------------
+# Each universe is requested from the active provider in one batched call instead of one
+# round trip per ticker, and persisted in the price store.
+
+logger = logging.getLogger(__name__)
+
+# History kept in memory by every loader; pages query ranges of it------------------------
+HISTORY_START = dt.date(2021, 1, 1)
+
+# Range the pages show until the reader picks another one
+DEFAULT_START = dt.date(2025, 1, 1)
+DEFAULT_END = dt.date(2025, 12, 31)
+
+# Chart title label for a date range: "2025" for a whole calendar year, else the two dates
+def period_label(start, end):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start.year != end.year:
+        return f"{start.day} {start:%b %Y} – {end.day} {end:%b %Y}"
+    if (start.month, start.day, end.month, end.day) == (1, 1, 12, 31):
+        return str(start.year)
+    return f"{start.day} {start:%b} – {end.day} {end:%b %Y}"
+
+# ... of the dates a chart's data spans, for charts not given the picked range
+def index_period(index):
+    return period_label(index[0], index[-1])
+
+# Exclusive end of the history: through today's bar
+def history_end():
+    return dt.date.today() + dt.timedelta(days=1)
+
+# Intraday mode: INTRADAY_INTERVAL bars over the last INTRADAY_DAYS calendar days
+# (Yahoo keeps 7 days of 1-minute and 60 days of 5-minute bars)
+INTRADAY_INTERVAL = '5m'
+INTRADAY_DAYS = 5
+
+def intraday_start():
+    return dt.date.today() - dt.timedelta(days=INTRADAY_DAYS)
+
+# Compact frames: categorical Ticker/label columns, float32 prices, narrowest volume dtype.
+# Set COMPACT_FRAMES=0 to keep the full float64/object frames.
+COMPACT = os.environ.get('COMPACT_FRAMES', '1') != '0'
+
+# Bytes held per dataset before and after compacting, keyed by '<dataset> <interval>'
+# (e.g. 'commodities 5m'); shown in the TIMING=panel sidebar
+memory_report = {}
+
+# Process-wide price store per provider and bar interval---------------------------------
+# Fixture data never mixes with live data, and intraday bars live in their own directory.
+_stores = {}
+_store_lock = threading.Lock()
+
+def get_store(provider=None, interval='1d'):
+    provider = provider or get_provider()
+    with _store_lock:
+        key = (provider.name, interval)
+        if key not in _stores:
+            root = STORE_DIR if provider.name == 'live' else os.path.join(STORE_DIR, provider.name)
+            if interval != '1d':
+                root = os.path.join(root, interval)
+            _stores[key] = PriceStore(root)
+        return _stores[key]
+
+# Relative change of a stored close that counts as a new adjustment basis
+ADJUSTMENT_RTOL = 1e-5
+
+# Fetch only the date ranges the store does not hold yet------------------------------------
+# Returns {symbol: error} for the symbols whose download failed; everything else is in the
+# store. A bad ticker comes back from the provider as its own error, so it does not take the
+# rest of its batch down with it.
+# Daily prices are split/dividend adjusted, so bars stored earlier change basis after a split
+# or dividend. A delta fetch therefore starts at the last stored bar that is final; when that
+# bar comes back with a different close, the symbol's whole history is fetched again and
+# replaces what is stored, instead of the new bars being appended on another basis.
+def sync_store(store, symbols, start, end, provider=None, interval='1d'):
+    provider = provider or get_provider()
+
+    # Symbols missing the same range share one batched download (through the fetch layer,
+    # which joins downloads of the same symbols already in flight)
+    plan = {}
+    for symbol in symbols:
+        for gap in store.missing(symbol, start, end):
+            plan.setdefault(gap, []).append(symbol)
+
+    failed, refetch = {}, {}
+    for (gap_start, gap_end), batch in plan.items():
+        anchors = _anchors(store, batch, gap_start) if interval == '1d' else {}
+        fetch_start = min([gap_start, *(bar.name.date() for bar in anchors.values())])
+        with span('fetch', f'sync {len(batch)} symbols'):
+            frames = _download(provider, batch, fetch_start, gap_end, interval)
+        for symbol, df in frames.items():
+            if isinstance(df, Exception):
+                failed[symbol] = f'{type(df).__name__}: {df}'
+            elif df is None or df.empty:
+                continue
+            elif symbol in anchors and not _same_basis(anchors[symbol], df):
+                refetch.setdefault((store.coverage(symbol)[0], gap_end), []).append(symbol)
+            else:
+                store.write(symbol, df, gap_start, gap_end)
+
+    for (full_start, full_end), batch in refetch.items():
+        logger.info("Adjusted prices of %s changed, fetching their history again", ', '.join(batch))
+        with span('fetch', f'refetch {len(batch)} symbols'):
+            frames = _download(provider, batch, full_start, full_end, interval)
+        for symbol, df in frames.items():
+            if isinstance(df, Exception):
+                failed[symbol] = f'{type(df).__name__}: {df}'
+            elif df is not None and not df.empty:
+                store.write(symbol, df, full_start, full_end, replace=True)
+    return failed
+
+# Last stored bar before `gap_start` of each symbol whose coverage ends there (bars before the
+# coverage end are final)
+def _anchors(store, batch, gap_start):
+    anchors = {}
+    for symbol in batch:
+        covered = store.coverage(symbol)
+        if covered is None or covered[1] != gap_start:
+            continue
+        stored = store.read(symbol, end=gap_start)
+        if stored is not None and not stored.empty:
+            anchors[symbol] = stored.iloc[-1]
+    return anchors
+
+# Whether a fetched frame has the stored anchor bar at the same (adjusted) close
+def _same_basis(anchor, df):
+    if anchor.name not in df.index:
+        return True
+    return bool(np.isclose(df.loc[anchor.name, 'Close'], anchor['Close'], rtol=ADJUSTMENT_RTOL))
+
+# {symbol: frame, or the exception its download ended with}
+# A download that still raises after the fetch layer's retries failed as a whole (the upstream
+# is down or rate limiting), so every symbol of the batch gets that error; fetching them one
+# by one would only repeat the retries per symbol while the page waits.
+def _download(provider, batch, start, end, interval):
+    try:
+        return fetch_prices(provider, batch, start, end, interval)
+    except Exception as e:
+        logger.warning("Download of %d symbols failed: %r", len(batch), e)
+        return {symbol: e for symbol in batch}
+
+# Per-asset load status, kept in a loaded frame's attrs-----------------------------------
+#   attrs['status']  {name: {'symbol', 'state', 'error'}}, state one of
+#                    'ok'      up to date
+#                    'stale'   the update failed; the bars already stored are served
+#                    'failed'  no data at all (the asset is left out of the frame)
+#   attrs['partial'] names not 'ok'; the loader caches keep a partial frame only briefly, so
+#                    the failed symbols are fetched again soon (and only those: the store
+#                    holds the others)
+def ticker_status(symbol, state='ok', error=None):
+    return {'symbol': symbol, 'state': state, 'error': error}
+
+def with_status(data, status):
+    data.attrs['status'] = status
+    data.attrs['partial'] = sorted(name for name, entry in status.items() if entry['state'] != 'ok')
+    return data
+
+# Normalized (name, Date) frame with Ticker and label columns------------------------------
+# Assets that could not be loaded are left out and reported in attrs['status'] (see above);
+# only when none of them could be is UpstreamError raised. `dataset` names the universe in
+# memory_report (the label by default).
+def load_universe(tickers, start, end, label='Name', interval='1d', dataset=None):
+    provider = get_provider()
+    store = get_store(provider, interval)
+    failed = sync_store(store, list(tickers.values()), start, end, provider, interval)
+
+    data, status = {}, {}
+    for name, symbol in tickers.items():
+        df = store.read(symbol, start, end)
+        if df is None or df.empty:
+            status[name] = ticker_status(symbol, 'failed', failed.get(symbol, 'no data returned'))
+            continue
+        status[name] = ticker_status(symbol, 'stale', failed[symbol]) if symbol in failed else ticker_status(symbol)
+        df.columns.name = 'Price'
+        df.index.name = 'Date'
+        df['Ticker'] = symbol
+        df[label] = name
+        data[name] = df
+
+    if not data:
+        raise UpstreamError(f"No data for any of {', '.join(tickers.values())}: {failed}")
+
+    data = pd.concat(data)
+    if COMPACT:
+        data = compact(data, label, f'{dataset or label} {interval}')
+    return with_status(data, status)
+
+# Deep memory footprint of a frame, index included------------------------------------------
+def memory_usage(data):
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+# Shrink a loaded universe frame----------------------------------------------------------------
+def compact(data, label, dataset=None):
+    before = memory_usage(data)
+
+    data = data.copy()
+    for column in ('Ticker', label):
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+    for column in ('Open', 'High', 'Low', 'Close'):
+        if column in data.columns:
+            data[column] = data[column].astype(np.float32)
+    if 'Volume' in data.columns:
+        volume = data['Volume']
+        if volume.notna().all() and (volume >= 0).all():
+            data['Volume'] = pd.to_numeric(volume.astype(np.int64), downcast='unsigned')
+        else:
+            data['Volume'] = volume.astype(np.float32)
+
+    after = memory_usage(data)
+    memory_report[dataset or label] = {'before': before, 'after': after}
+    logger.info("%s frame: %.2f MB -> %.2f MB", dataset or label, before / 1e6, after / 1e6)
+    return data
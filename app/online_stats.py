@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+# Incremental statistics over a date x asset close matrix-------------------------------------
+# Running state is kept per asset and per asset pair so that appending one new bar costs
+# O(assets^2) instead of recomputing over the whole history:
+#   - Welford mean and co-moment matrix of daily returns (volatility, covariance,
+#     correlation), updated only on bars where every asset has a return, the same rows
+#     `returns.dropna()` keeps;
+#   - per asset, over its own bars only (calendars differ: Bitcoin trades weekends), the first
+#     and last close, a Welford variance of its returns and the last `depth` closes with
+#     running sums of the trailing 50/200 bars: trailing returns, volatility and moving
+#     averages for the summary table, like `dropna()` followed by `pct_change()`/`rolling(w)`.
+class OnlineStats:
+    def __init__(self, assets, windows=(50, 200), trading_days=252, depth=None):
+        self.assets = list(assets)
+        self.windows = tuple(windows)
+        self.trading_days = trading_days
+        # Closes kept per asset: enough for the longest window and the longest trailing return
+        self.depth = depth or max(self.windows)
+
+        k = len(self.assets)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+        self.bars = 0
+        self.last_date = None
+        self.last_close = np.full(k, np.nan)
+
+        self.own_bars = np.zeros(k, dtype=int)
+        self.first_close = np.full(k, np.nan)
+        self.own_last = np.full(k, np.nan)
+        self._own_count = np.zeros(k, dtype=int)
+        self._own_mean = np.zeros(k)
+        self._own_m2 = np.zeros(k)
+        self._buffer = np.full((self.depth, k), np.nan)
+        self._sums = {w: np.zeros(k) for w in self.windows}
+
+    # Build the state for a whole history in a few array operations---------------------------
+    @classmethod
+    def from_close(cls, close, windows=(50, 200), trading_days=252, depth=None):
+        stats = cls(close.columns, windows, trading_days, depth)
+        values = close.to_numpy(dtype=np.float64)
+        if not len(values):
+            return stats
+
+        returns = values[1:] / values[:-1] - 1
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        if len(returns):
+            stats.count = len(returns)
+            stats.mean = returns.mean(axis=0)
+            centered = returns - stats.mean
+            stats.comoment = centered.T @ centered
+
+        stats.bars = len(values)
+        stats.last_close = values[-1].copy()
+        stats.last_date = close.index[-1]
+
+        # Own bars: each column's valid closes packed to the top, row k its k-th bar
+        packed, counts = pack_valid(values)
+        cols = np.arange(packed.shape[1])
+        has = counts > 0
+        stats.own_bars = counts
+        stats.first_close = np.where(has, packed[0], np.nan)
+        stats.own_last = np.where(has, packed[np.maximum(counts - 1, 0), cols], np.nan)
+
+        own_returns = packed[1:] / packed[:-1] - 1
+        stats._own_count = np.maximum(counts - 1, 0)
+        stats._own_mean = np.nansum(own_returns, axis=0) / np.maximum(stats._own_count, 1)
+        stats._own_m2 = np.nansum((own_returns - stats._own_mean) ** 2, axis=0)
+
+        for j in range(stats.depth):
+            t = counts - stats.depth + j
+            ok = t >= 0
+            stats._buffer[t[ok] % stats.depth, cols[ok]] = packed[t[ok], cols[ok]]
+        cumsum = np.vstack([np.zeros(packed.shape[1]), np.nancumsum(packed, axis=0)])
+        for w in stats.windows:
+            stats._sums[w] = cumsum[counts, cols] - cumsum[np.clip(counts - w, 0, None), cols]
+        return stats
+
+    # Fold in one new bar (closes aligned with self.assets)----------------------------------
+    def update(self, close, date=None):
+        close = np.asarray(close, dtype=np.float64)
+
+        if self.bars:
+            returns = close / self.last_close - 1
+            if not np.isnan(returns).any():
+                self.count += 1
+                delta = returns - self.mean
+                self.mean += delta / self.count
+                self.comoment += np.outer(delta, returns - self.mean)
+
+        # Per asset, only the assets that have a bar on this date
+        cols = np.flatnonzero(~np.isnan(close))
+        value = close[cols]
+        bars = self.own_bars[cols]
+
+        seen = bars > 0
+        step = cols[seen]
+        returns = value[seen] / self.own_last[step] - 1
+        self._own_count[step] += 1
+        delta = returns - self._own_mean[step]
+        self._own_mean[step] += delta / self._own_count[step]
+        self._own_m2[step] += delta * (returns - self._own_mean[step])
+
+        for w in self.windows:
+            full = bars >= w
+            leaving = self._buffer[(bars[full] - w) % self.depth, cols[full]]
+            self._sums[w][cols[full]] -= leaving
+            self._sums[w][cols] += value
+        self._buffer[bars % self.depth, cols] = value
+        self.first_close[cols[~seen]] = value[~seen]
+        self.own_last[cols] = value
+        self.own_bars[cols] += 1
+
+        self.bars += 1
+        self.last_close = close
+        self.last_date = date
+
+    # Fold in every row of a close matrix dated after the last bar seen-----------------------
+    def extend(self, close):
+        close = close.reindex(columns=self.assets)
+        if self.last_date is not None:
+            close = close.loc[close.index > self.last_date]
+        for date, row in zip(close.index, close.to_numpy(dtype=np.float64)):
+            self.update(row, date)
+        return self
+
+    # True when `close` is the data already folded in plus newer rows---------------------------
+    def can_extend(self, close):
+        if list(close.columns) != self.assets:
+            return False
+        if self.last_date is None:
+            return True
+        if self.last_date not in close.index:
+            return False
+        seen = close.loc[:self.last_date]
+        if len(seen) != self.bars:
+            return False
+        return np.array_equal(seen.iloc[-1].to_numpy(dtype=np.float64), self.last_close, equal_nan=True)
+
+    # Results---------------------------------------------------------------------------------
+    @property
+    def covariance(self):
+        if self.count < 2:
+            values = np.full_like(self.comoment, np.nan)
+        else:
+            values = self.comoment / (self.count - 1)
+        return pd.DataFrame(values, index=self.assets, columns=self.assets)
+
+    @property
+    def volatility(self):
+        variance = np.diag(self.covariance.to_numpy())
+        return pd.Series(np.sqrt(variance * self.trading_days), index=self.assets)
+
+    @property
+    def correlation(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = self.comoment / np.outer(scale, scale)
+        if self.count < 2:
+            values = np.full_like(values, np.nan)
+        return pd.DataFrame(values, index=self.assets, columns=self.assets)
+
+    # Annualized volatility of each asset's returns between its own bars
+    @property
+    def asset_volatility(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.where(self._own_count >= 2, self._own_m2 / (self._own_count - 1), np.nan)
+        return pd.Series(np.sqrt(variance * self.trading_days), index=self.assets)
+
+    # Return over each asset's last `bars` own bars (NaN if it has fewer)
+    def trailing_return(self, bars):
+        if bars >= self.depth:
+            raise ValueError(f"only the last {self.depth} closes are kept, not {bars + 1}")
+        idx = self.own_bars - 1 - bars
+        cols = np.arange(len(self.assets))
+        past = np.where(idx >= 0, self._buffer[np.clip(idx, 0, None) % self.depth, cols], np.nan)
+        return pd.Series(self.own_last / past - 1, index=self.assets)
+
+    # Return from each asset's first bar to its last
+    @property
+    def total_return(self):
+        return pd.Series(self.own_last / self.first_close - 1, index=self.assets)
+
+    # Mean of each asset's last `window` own closes (NaN if it has fewer bars)
+    def moving_average(self, window):
+        ready = self.own_bars >= window
+        return pd.Series(np.where(ready, self._sums[window] / window, np.nan), index=self.assets)
+
+
+# Pack each column's valid values to the top so row k is the column's k-th valid value----
+def pack_valid(values):
+    valid = ~np.isnan(values)
+    order = np.argsort(~valid, axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
@@ -1,8 +1,4 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 import sys
 import os
 from theme import apply_paper_theme
@@ -10,22 +6,27 @@ from theme import apply_paper_theme
 # Apply the newspaper/paper theme
 apply_paper_theme()
 
-plt.switch_backend("Agg")
-
 # Path adjustment so Streamlit can import commodities module
 current_dir = os.path.dirname(os.path.abspath(__file__))
 app_dir = os.path.dirname(current_dir)
 sys.path.append(app_dir)
 
 from commodities import (
-    get_commodities,
+    get_commodity_panel,
+    get_commodity_intraday_panel,
+    prepare_data,
     compute_summary,
+    format_summary,
     commodity_correlation,
-    plot_price,
-    plot_normalized,
-    plot_moving_averages,
-    commodities
+    plot_normalized
 )
+from prefetch import start_prefetch
+from market_data import period_label
+from controls import date_range_selector, data_status_notice, empty_range_notice
+from figures import show
+from timing import start_run, debug_panel
+
+start_run('Commodities')
 
 #Streampage config
 st.set_page_config(
@@ -63,13 +64,23 @@ This dashboard follows key commodities across energy, metals, and agriculture to
 
 st.divider()
 
-#load Data
-data = get_commodities()
+#load Data (waits for the background prefetch if it is still running)
+start_prefetch()
+panel = get_commodity_panel()
+data_status_notice(panel.status)
+
+# Any range of the loaded history is answered from memory
+start, end = date_range_selector(panel.dates, key="commodities_range")
+panel = panel.query(start, end)
+has_data = not empty_range_notice(panel.dates, start, end)
+analytics = prepare_data(panel) if has_data else None
+period = period_label(start, end)
 
 #Perfomance Summary
 st.markdown("<h2>Performance Summary</h2>", unsafe_allow_html=True)
-summary = compute_summary(data)
-st.dataframe(summary, use_container_width=True)
+if has_data:
+    summary = compute_summary(analytics)
+    st.dataframe(format_summary(summary), use_container_width=True)
 st.markdown(
     """
     <div style='padding:0.5rem 0; color:#555555; font-size:0.95rem;'>
@@ -92,23 +103,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Compute correlation
-pivoted = data.reset_index().pivot(index="Date", columns="Name", values="Close")
-corr = pivoted.corr()
-mask = np.triu(np.ones_like(corr, dtype=bool))
-
-fig = plt.figure(figsize=(12, 8))
-sns.heatmap(
-    corr,
-    annot=True,
-    fmt=".2f",
-    cmap="coolwarm",
-    linewidths=0.7,
-    mask=mask,
-    cbar_kws={"shrink": 0.8}
-)
-plt.title("Commodity Correlation Heatmap")
-st.pyplot(fig)
+if has_data:
+    show(commodity_correlation(analytics, period=period))
 
 st.divider()
 
@@ -123,17 +119,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-fig = plt.figure(figsize=(12, 6))
-norm = pivoted / pivoted.iloc[0] * 100
-
-plt.gca().set_prop_cycle(None)
-for name in commodities.keys():
-    plt.plot(norm.index, norm[name], label=name)
-
-plt.title("Normalized Commodity Prices (Indexed to 100)")
-plt.grid(True)
-plt.legend()
-st.pyplot(fig)
+if has_data:
+    show(plot_normalized(analytics, period))
 
 st.markdown(
     """
@@ -150,6 +137,23 @@ st.markdown(
 
 st.divider()
 
+#Intraday
+st.markdown("<h2>Intraday Moves</h2>", unsafe_allow_html=True)
+st.markdown(
+    """
+    <div style='padding:0.5rem 0; color:#555555; font-size:0.95rem;'>
+    Daily closes hide how prices travel within the session. Switch on intraday mode to see five-minute bars for the last few trading days, indexed to 100 at the first bar.
+    </div>
+    """,
+    unsafe_allow_html=True
+)
+
+if st.toggle("Show intraday bars", key="commodities_intraday"):
+    intraday = prepare_data(get_commodity_intraday_panel())
+    show(plot_normalized(intraday, period="Intraday, 5-minute bars"))
+
+st.divider()
+
 #Key takeaways
 st.markdown("<h2>Key Takeaways</h2>", unsafe_allow_html=True)
 st.markdown(
@@ -172,3 +176,4 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+debug_panel()
@@ -3,8 +3,15 @@ import sys, os
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from region_data import run_region_analysis
+from region_data import run_region_analysis, get_region_panel, get_region_intraday_panel, intraday_price_trends, rolling_correlation_heatmap, average_rolling_correlation
 from theme import apply_paper_theme
+from prefetch import start_prefetch
+from controls import date_range_selector, data_status_notice, empty_range_notice
+from figure_cache import show_figure, show_rendered
+from figures import show
+from timing import start_run, debug_panel
+
+start_run('Region')
 
 # Theme
 apply_paper_theme()
@@ -41,8 +48,12 @@ Here we will look at major stock indices across the United States, Europe, the U
 
 st.markdown("<hr>", unsafe_allow_html=True)
 
-# Data
-figs = run_region_analysis()
+# Data (waits for the background prefetch if it is still running)
+start_prefetch()
+data_status_notice(get_region_panel().status)
+start, end = date_range_selector(get_region_panel().dates, key="region_range")
+has_data = not empty_range_notice(get_region_panel().query(start, end).dates, start, end)
+figs = run_region_analysis(start, end) if has_data else None
 
 # Normalized Perfomance
 st.markdown("## Normalized Market Performance")
@@ -51,7 +62,8 @@ st.markdown("""
 To make comparisons fair, all indices are normalized to 100 at the start of 2025. This highlights relative performance across regions rather than absolute index levels.
 """)
 
-st.pyplot(figs["normalized"])
+if has_data:
+    show_rendered(figs["normalized"])
 
 st.markdown("""
 ### Market Commentary
@@ -79,7 +91,8 @@ Volatility measures the magnitude of price swings within each market. Higher vol
 and sensitivity to shocks, while lower volatility suggests relative stability.
 """)
 
-st.pyplot(figs["volatility"])
+if has_data:
+    show_rendered(figs["volatility"])
 
 st.markdown("""
 In 2025, Japan had the highest annualized volatility among major markets, reflecting sharper swings despite strong fundamentals. The April tariff shock affected nearly all regions at once, producing synchronized drawdowns across the globe. Even markets that eventually recovered quickly experienced heightened short-term swings.
@@ -97,7 +110,8 @@ Correlation measures how closely markets move together. High correlations indica
 while lower correlations suggest diversification potential.
 """)
 
-st.pyplot(figs["correlation"])
+if has_data:
+    show_rendered(figs["correlation"])
 
 st.markdown("""
 During periods of global stress, correlations tend to rise as investors react simultaneously to systemic risks.
@@ -105,6 +119,38 @@ The April 2025 sell-off was no exception. However, structural differences—such
 trade exposure, and sector composition—continue to create meaningful divergence across regions.
 """)
 
+st.markdown("### Correlations Over Time")
+
+st.markdown("""
+A single full-year matrix hides how correlations shift. Each point below is the average correlation across regions
+over the previous 60 trading days; move the slider to see the matrix for any window, such as the weeks after the April shock.
+""")
+
+rolling = figs["analytics"].rolling_correlation(60) if has_data else None
+if rolling is not None and len(rolling.dates):
+    window_end = st.select_slider(
+        "Window ending on:",
+        options=list(rolling.dates),
+        value=rolling.dates[-1],
+        format_func=lambda date: date.strftime("%d %b %Y")
+    )
+    show_figure(average_rolling_correlation, figs["analytics"], window_end, period=figs["period"])
+    show_figure(rolling_correlation_heatmap, figs["analytics"], window_end)
+
+st.markdown("<hr>", unsafe_allow_html=True)
+
+# Intraday
+st.markdown("## Intraday Price Trend")
+
+st.markdown("""
+Five-minute bars for the last few trading days show how each market moved through its sessions, with 30- and 90-bar moving averages.
+""")
+
+if st.toggle("Show intraday bars", key="region_intraday"):
+    intraday_panel = get_region_intraday_panel()
+    intraday_region = st.selectbox("Select a market:", intraday_panel.assets, key="region_intraday_choice")
+    show(intraday_price_trends(intraday_panel, intraday_region))
+
 st.markdown("<hr>", unsafe_allow_html=True)
 
 #Takeaways
@@ -125,3 +171,4 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+debug_panel()
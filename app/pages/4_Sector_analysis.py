@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import sys, os
 
 from theme import apply_paper_theme
@@ -10,12 +8,18 @@ apply_paper_theme()
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from sector_data import (
-    get_sector_performance,
+    get_sector_panel,
     prepare_data,
     cumulative_sector_performance,
     volatility,
     trend_analysis
 )
+from prefetch import start_prefetch
+from figure_cache import show_figure
+from controls import date_range_selector, data_status_notice, empty_range_notice
+from timing import start_run, debug_panel
+
+start_run('Sector')
 
 # Page Config
 st.set_page_config(
@@ -39,9 +43,14 @@ st.markdown(
 
 st.divider()
 
-# Load data
-raw_data = get_sector_performance()
-data = prepare_data(raw_data)
+# Load data (waits for the background prefetch if it is still running)
+start_prefetch()
+panel = get_sector_panel()
+data_status_notice(panel.status)
+start, end = date_range_selector(panel.dates, key="sector_range")
+panel = panel.query(start, end)
+has_data = not empty_range_notice(panel.dates, start, end)
+analytics = prepare_data(panel) if has_data else None
 
 # Introduction
 st.markdown(
@@ -72,9 +81,9 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-fig1 = plt.figure(figsize=(12, 6))
-cumulative_sector_performance(data)
-st.pyplot(fig1)
+# Served from the figure cache unless its inputs changed
+if has_data:
+    show_figure(cumulative_sector_performance, analytics)
 
 st.divider()
 
@@ -91,9 +100,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-fig2 = plt.figure(figsize=(12, 6))
-volatility(data)
-st.pyplot(fig2)
+if has_data:
+    show_figure(volatility, analytics)
 
 st.divider()
 
@@ -111,14 +119,18 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-sector_choice = st.selectbox(
-    "Select a sector to examine its trend:",
-    raw_data.index.get_level_values(0).unique().tolist()
-)
+# A fragment: changing the sector reruns only this section, not the whole page
+@st.fragment
+def sector_trend(panel):
+    sector_choice = st.selectbox(
+        "Select a sector to examine its trend:",
+        panel.assets
+    )
+
+    show_figure(trend_analysis, panel, sector_choice)
 
-fig3 = plt.figure(figsize=(12, 6))
-trend_analysis(raw_data, sector_choice)
-st.pyplot(fig3)
+if has_data:
+    sector_trend(panel)
 
 st.divider()
 
@@ -150,3 +162,4 @@ st.markdown(
 
 st.divider()
 
+debug_panel()
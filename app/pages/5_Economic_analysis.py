@@ -2,8 +2,14 @@ import streamlit as st
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from economic_conditions import run_economic_analysis, economic_indicators_raw
+from economic_conditions import get_economic_snapshot, run_economic_analysis, economic_indicators_raw
 from theme import apply_paper_theme
+from prefetch import start_prefetch
+from controls import date_range_selector, data_status_notice, empty_range_notice
+from figure_cache import show_figure, show_rendered
+from timing import start_run, debug_panel
+
+start_run('Economic')
 
 st.set_page_config(
     page_title="U.S. Economic Indicators",
@@ -31,21 +37,31 @@ and some November figures cover two months. Alternative estimates were used wher
 
 st.divider()
 
-# Run analysis
-figs = run_economic_analysis()
+# Run analysis (waits for the background prefetch if it is still running)
+start_prefetch()
+data_status_notice(get_economic_snapshot().attrs.get('status'))
+start, end = date_range_selector(get_economic_snapshot().index, key="economic_range")
+figs = run_economic_analysis(start, end)
+has_data = not empty_range_notice(figs['data'].index, start, end)
 indicators = figs['columns']
 
 st.subheader('Raw Indicator Performance')
 st.markdown("Pick an indicator to see its monthly trend and how it moved through 2025.")
-choice = st.selectbox('Select indicator:', indicators)
-fig = economic_indicators_raw(figs['data'], choice)
-st.pyplot(fig)
+# A fragment: changing the indicator reruns only this section, not the whole page
+@st.fragment
+def raw_indicator(data, indicators, period):
+    choice = st.selectbox('Select indicator:', indicators)
+    show_figure(economic_indicators_raw, data, choice, period)
+
+if has_data:
+    raw_indicator(figs['data'], indicators, figs['period'])
 
 st.divider()
 
 st.subheader('Normalized Performance')
 st.markdown("All indicators are set to 100 at the start of 2025 for easy comparison.")
-st.pyplot(figs['normalized'])
+if has_data:
+    show_rendered(figs['normalized'])
 
 st.markdown("""
 ### Highlights
@@ -65,3 +81,4 @@ st.markdown("""
 **Sources:** Bureau of Labor Statistics (CPI & Employment Nov 2025), Federal Reserve, Philadelphia Fed Survey Q4 2025, CNBC, NPR, Yahoo Finance
 """)
 
+debug_panel()
@@ -0,0 +1,131 @@
+import itertools
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from providers import OHLCV
+from timing import span, annotate
+
+# Read-only price panel shared by every session--------------------------------------------
+# The loaders return a long (name, Date) frame; pages read the same data through one
+# PricePanel per dataset version instead. Values live in a single read-only array laid
+# out (field, date, asset), float32 for compact frames and float64 otherwise, so field()
+# hands out date x asset frames that are views of it and nothing is copied per session.
+# Derived data (returns, moving averages, ...) is always computed out-of-place. Each panel
+# gets a new `version` token, which keys the caches built on top of it (rendered figures, ...).
+_versions = itertools.count(1)
+
+class PricePanel:
+    def __init__(self, assets, dates, fields, values, tickers=None, name=None, status=None):
+        values = np.asarray(values)
+        values.flags.writeable = False
+
+        self.assets = list(assets)
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.fields = list(fields)
+        self.values = values
+        self.tickers = dict(tickers or {})
+        self.name = name
+        # Load status per asset of the frame it came from (see market_data.with_status)
+        self.status = dict(status or {})
+        self.version = next(_versions)
+        self._asset_pos = {asset: i for i, asset in enumerate(self.assets)}
+        self._field_pos = {field: i for i, field in enumerate(self.fields)}
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    @classmethod
+    def from_long(cls, data, fields=OHLCV, name=None):
+        assets = list(data.index.get_level_values(0).unique())
+        dates = data.index.get_level_values(1).unique().sort_values()
+        fields = [field for field in fields if field in data.columns]
+
+        dtype = np.float32 if data['Close'].dtype == np.float32 else np.float64
+        values = np.full((len(fields), len(dates), len(assets)), np.nan, dtype=dtype)
+        for k, field in enumerate(fields):
+            wide = data[field].unstack(level=0).reindex(index=dates, columns=assets)
+            values[k] = wide.to_numpy(dtype=dtype, na_value=np.nan)
+
+        tickers = {}
+        if 'Ticker' in data.columns:
+            tickers = data['Ticker'].groupby(level=0).first().to_dict()
+        return cls(assets, dates, fields, values, tickers, name, data.attrs.get('status'))
+
+    @property
+    def shape(self):
+        return len(self.assets), len(self.dates), len(self.fields)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    # Range query: dates found by binary search, [start, end] inclusive-------------------------
+    # A date-only query is a view of this panel's array; picking assets or fields copies just
+    # that subset. Recent queries are memoized so a page rerun gets back the same panel (and
+    # with it the same cached analytics).
+    QUERY_CACHE_SIZE = 16
+
+    def query(self, start=None, end=None, assets=None, fields=None):
+        key = (
+            None if start is None else pd.Timestamp(start),
+            None if end is None else pd.Timestamp(end),
+            None if assets is None else tuple(assets),
+            None if fields is None else tuple(fields)
+        )
+        if key == (None, None, None, None):
+            return self
+
+        with self._queries_lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+        lo = 0 if key[0] is None else self.dates.searchsorted(key[0], side='left')
+        hi = len(self.dates) if key[1] is None else self.dates.searchsorted(key[1], side='right')
+        values = self.values[:, lo:hi, :]
+
+        fields = self.fields if fields is None else list(fields)
+        if fields != self.fields:
+            values = values[[self._field_pos[field] for field in fields]]
+        assets = self.assets if assets is None else list(assets)
+        if assets != self.assets:
+            values = values[:, :, [self._asset_pos[asset] for asset in assets]]
+
+        tickers = {asset: self.tickers[asset] for asset in assets if asset in self.tickers}
+        result = PricePanel(assets, self.dates[lo:hi], fields, values, tickers, self.name, self.status)
+
+        with self._queries_lock:
+            self._queries[key] = result
+            while len(self._queries) > self.QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return result
+
+    # Date x asset frame for one field (a view of the panel)---------------------------------
+    def field(self, field='Close'):
+        block = self.values[self._field_pos[field]]
+        return pd.DataFrame(block, index=self.dates, columns=pd.Index(self.assets), copy=False)
+
+    # Date x field frame for one asset, without the dates it has no bars for-----------------
+    def asset(self, asset):
+        block = self.values[:, :, self._asset_pos[asset]].T
+        df = pd.DataFrame(block, index=self.dates, columns=pd.Index(self.fields, name='Price'), copy=False)
+        return df[~np.isnan(block[:, self._field_pos['Close']])] if 'Close' in self._field_pos else df
+
+
+# One panel per loader and dataset version--------------------------------------------------
+# The ttl_cache loaders hand back the same frame until a refresh replaces it, so the frame's
+# identity is the dataset version.
+_panels = {}
+_panels_lock = threading.Lock()
+
+def shared_panel(loader):
+    frame = loader()
+    with span('compute', f'panel {loader.__name__}'), _panels_lock:
+        entry = _panels.get(loader.__name__)
+        if entry is None or entry[0] is not frame:
+            annotate('miss')
+            entry = (frame, PricePanel.from_long(frame, name=loader.__name__))
+            _panels[loader.__name__] = entry
+        else:
+            annotate('hit')
+        return entry[1]
@@ -0,0 +1,36 @@
+import logging
+import importlib
+import threading
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Datasets warmed in the background, as (module, loader)----------------------------------
+# The data modules (and pandas with them) are imported on the prefetch threads, so a page
+# that needs none of them, like Home, does not wait for those imports.
+DATASETS = {
+    'commodities': ('commodities', 'get_commodities'),
+    'region': ('region_data', 'get_region_performance'),
+    'sector': ('sector_data', 'get_sector_performance'),
+    'economic': ('economic_conditions', 'get_economic_snapshot')
+}
+
+def _warm(name, module, loader):
+    try:
+        getattr(importlib.import_module(module), loader)()
+    except Exception:
+        # The page that needs this dataset will retry the fetch itself
+        logger.exception("Prefetch of %s failed", name)
+
+# Start warming every dataset once per process------------------------------------------
+# The loaders are ttl_cache functions, which hold a per-key lock while computing, so a
+# page that asks for a dataset still being warmed waits for this fetch instead of
+# starting its own.
+@st.cache_resource(show_spinner=False)
+def start_prefetch():
+    threads = {}
+    for name, (module, loader) in DATASETS.items():
+        thread = threading.Thread(target=_warm, args=(name, module, loader), name=f'prefetch-{name}', daemon=True)
+        thread.start()
+        threads[name] = thread
+    return threads
@@ -0,0 +1,117 @@
+import os
+import json
+import threading
+import datetime as dt
+from urllib.parse import quote
+import pandas as pd
+
+# On-disk price store: one Parquet file per ticker plus a manifest-------------------------
+# The manifest records, per symbol, the date range already fetched ([start, end), the
+# same convention as yf.download) and the last bar held, so loaders only request the
+# dates that are missing. A write with replace=True discards the symbol's stored bars and
+# coverage instead of merging into them (a full re-fetch after an adjustment change).
+STORE_DIR = os.environ.get(
+    'PRICE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'prices')
+)
+
+MANIFEST = '_manifest.json'
+
+
+def _to_date(value):
+    return pd.Timestamp(value).date()
+
+
+class PriceStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest = self._load_manifest()
+
+    # Manifest-----------------------------------------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._manifest_path())
+
+    def _path(self, symbol):
+        return os.path.join(self.root, quote(symbol, safe='') + '.parquet')
+
+    # Coverage-----------------------------------------------------------------------------
+    def coverage(self, symbol):
+        entry = self._manifest.get(symbol)
+        if entry is None:
+            return None
+        return _to_date(entry['start']), _to_date(entry['end'])
+
+    def last_bar(self, symbol):
+        entry = self._manifest.get(symbol)
+        if entry is None or entry.get('last_bar') is None:
+            return None
+        return _to_date(entry['last_bar'])
+
+    # Date ranges still missing for [start, end); today and later are never covered--------
+    def missing(self, symbol, start, end):
+        start, end = _to_date(start), _to_date(end)
+        end = min(end, dt.date.today() + dt.timedelta(days=1))
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, end)] if start < end else []
+
+        cov_start, cov_end = covered
+        gaps = []
+        if start < cov_start:
+            gaps.append((start, cov_start))
+        if end > cov_end:
+            gaps.append((max(start, cov_end), end))
+        return [(s, e) for s, e in gaps if s < e]
+
+    # Read / write-------------------------------------------------------------------------
+    def read(self, symbol, start=None, end=None):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_parquet(path)
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df.loc[df.index < pd.Timestamp(end)]
+        return df
+
+    def write(self, symbol, df, start, end, replace=False):
+        start, end = _to_date(start), _to_date(end)
+        # The current session's bar may still change, so coverage stops before today
+        end = min(end, dt.date.today())
+
+        with self._lock:
+            existing = None if replace else self.read(symbol)
+            if existing is not None and not existing.empty:
+                df = pd.concat([existing, df])
+                df = df[~df.index.duplicated(keep='last')]
+            df = df.sort_index()
+
+            tmp = self._path(symbol) + '.tmp'
+            df.to_parquet(tmp)
+            os.replace(tmp, self._path(symbol))
+
+            covered = None if replace else self.coverage(symbol)
+            if covered is not None:
+                start, end = min(start, covered[0]), max(end, covered[1])
+            self._manifest[symbol] = {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'last_bar': df.index.max().date().isoformat() if not df.empty else None
+            }
+            self._save_manifest()
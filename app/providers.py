@@ -0,0 +1,306 @@
+import os
+import time
+import zlib
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+# Data providers-------------------------------------------------------------------------
+# Every market and FRED fetch goes through the active provider:
+#   download(symbols, start, end, interval) -> {symbol: OHLCV frame indexed by Date, or the
+#       UpstreamError that symbol failed with}; raises UpstreamError when the call fails as a whole
+#   fred_series(series_id, start, end) -> Series indexed by observation date
+# DATA_PROVIDER=live (default) uses yfinance/fredapi, DATA_PROVIDER=fixture replays
+# recorded files from FIXTURE_DIR or synthesizes deterministic data offline.
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _empty_frame():
+    df = pd.DataFrame(columns=OHLCV, index=pd.DatetimeIndex([], name='Date'), dtype=float)
+    df.columns.name = 'Price'
+    return df
+
+
+# Bar length in minutes for an intraday interval such as '1m', '5m' or '1h'
+def interval_minutes(interval):
+    unit = interval[-1]
+    return int(interval[:-1]) * (60 if unit == 'h' else 1)
+
+
+# Raised by a provider when an upstream call fails; the fetch layer retries it
+class UpstreamError(Exception):
+    pass
+
+
+class DataProvider(ABC):
+    name = 'base'
+
+    @abstractmethod
+    def download(self, symbols, start, end, interval='1d'):
+        ...
+
+    @abstractmethod
+    def fred_series(self, series_id, start, end):
+        ...
+
+
+# Yahoo Finance + FRED over the network---------------------------------------------------
+# yf.download keeps its results in module globals (yfinance.shared) that every call resets
+# and then polls, so two downloads running at once wipe each other's tickers. Calls from the
+# fetch layer's slots and the prefetch threads therefore take turns on this lock.
+_download_lock = threading.Lock()
+
+# yf.download does not raise for a ticker that fails: it records repr(error) in
+# yfinance.shared._ERRORS and returns no bars for it. A range without any trading day
+# (a weekend delta) is reported the same way, but is no error.
+NO_BARS_ERRORS = ('YFPricesMissingError',)
+
+
+class LiveProvider(DataProvider):
+    name = 'live'
+
+    # Tickers per batched yf.download request
+    BATCH_SIZE = 25
+
+    def __init__(self):
+        self._fred = None
+        self._fred_lock = threading.Lock()
+
+    # Pull one symbol's OHLCV block out of a batched download
+    @staticmethod
+    def _extract(batch, symbol):
+        if isinstance(batch.columns, pd.MultiIndex):
+            if symbol not in batch.columns.get_level_values(0):
+                return _empty_frame()
+            df = batch[symbol]
+        else:
+            df = batch
+
+        df = df.dropna(how='all').copy()
+        # Intraday bars come back in exchange time; keep everything as naive UTC
+        if getattr(df.index, 'tz', None) is not None:
+            df.index = df.index.tz_convert('UTC').tz_localize(None)
+        df.columns.name = 'Price'
+        df.index.name = 'Date'
+        return df
+
+    def download(self, symbols, start, end, interval='1d'):
+        import yfinance as yf
+
+        frames = {}
+        for i in range(0, len(symbols), self.BATCH_SIZE):
+            batch = symbols[i:i + self.BATCH_SIZE]
+            with _download_lock:
+                raw = yf.download(
+                    batch,
+                    start=start,
+                    end=end,
+                    interval=interval,
+                    auto_adjust=True,
+                    group_by='ticker',
+                    threads=True,
+                    progress=False
+                )
+                errors = dict(yf.shared._ERRORS)
+            for symbol in batch:
+                error = errors.get(symbol.upper())
+                if error and not error.startswith(NO_BARS_ERRORS):
+                    frames[symbol] = UpstreamError(f'{symbol}: {error}')
+                else:
+                    frames[symbol] = self._extract(raw, symbol)
+
+        # Nothing came back: fail the call, so the fetch layer retries it
+        if frames and all(isinstance(df, UpstreamError) for df in frames.values()):
+            raise UpstreamError(f'download of {len(symbols)} symbols failed: {frames[symbols[0]]}')
+        return frames
+
+    def _client(self):
+        with self._fred_lock:
+            if self._fred is None:
+                import streamlit as st
+                from fredapi import Fred
+                self._fred = Fred(api_key=st.secrets['FRED_API_KEY'])
+            return self._fred
+
+    def fred_series(self, series_id, start, end):
+        # Ask FRED only for the observation window we need
+        return self._client().get_series(series_id, observation_start=start, observation_end=end)
+
+
+# Offline provider: recorded fixtures, else deterministic synthetic data-------------------
+# Synthetic prices are a seeded random walk per symbol starting at ORIGIN, so any date
+# range of any symbol is reproducible. `latency` adds a fixed delay per call, `missing` drops
+# that fraction of bars and `errors` makes that fraction of calls fail with UpstreamError,
+# to mimic a real upstream.
+class FixtureProvider(DataProvider):
+    name = 'fixture'
+
+    ORIGIN = pd.Timestamp('2015-01-01')
+
+    # FRED release frequency per series; anything not listed is monthly
+    FRED_FREQUENCIES = {'DGS10': 'B', 'GDP': 'QS'}
+
+    def __init__(self, root=None, seed=0, latency=0.0, missing=0.0, errors=0.0):
+        self.root = root
+        self.seed = seed
+        self.latency = latency
+        self.missing = missing
+        self.errors = errors
+        self._faults = np.random.default_rng(seed)
+        self._faults_lock = threading.Lock()
+
+    def _rng(self, key):
+        return np.random.default_rng([zlib.crc32(key.encode()), self.seed])
+
+    def _recorded(self, kind, key):
+        if self.root is None:
+            return None
+        path = os.path.join(self.root, kind, quote(key, safe='') + '.parquet')
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def synthetic_ohlcv(self, symbol, end):
+        dates = pd.bdate_range(self.ORIGIN, pd.Timestamp(end), name='Date')
+        n = len(dates)
+
+        # One random stream per quantity, each drawn bar by bar from ORIGIN, so a bar's values
+        # do not depend on how many bars after it were generated
+        rng = self._rng(symbol)
+        base = 20 + 480 * rng.random()
+        close = base * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))
+        open_ = np.concatenate([[base], close[:-1]]) * (1 + self._rng(f'{symbol}:open').normal(0, 0.002, n))
+        high = np.maximum(open_, close) * (1 + np.abs(self._rng(f'{symbol}:high').normal(0, 0.004, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(self._rng(f'{symbol}:low').normal(0, 0.004, n)))
+        volume = self._rng(f'{symbol}:volume').integers(1_000_000, 50_000_000, n).astype(float)
+
+        df = pd.DataFrame(
+            {'Close': close, 'High': high, 'Low': low, 'Open': open_, 'Volume': volume},
+            index=dates
+        )
+        df.columns.name = 'Price'
+        if self.missing:
+            df = df[self._rng(f'{symbol}:missing').random(n) >= self.missing]
+        return df
+
+    # Intraday bars between 14:30 and 21:00 UTC, walking from each day's synthetic open
+    def synthetic_intraday(self, symbol, start, end, interval):
+        daily = self.synthetic_ohlcv(symbol, end)
+        step = interval_minutes(interval)
+        frames = []
+        for day, row in daily.loc[(daily.index >= start) & (daily.index < end)].iterrows():
+            times = pd.date_range(day + pd.Timedelta(hours=14, minutes=30), day + pd.Timedelta(hours=21),
+                                  freq=f'{step}min', inclusive='left', name='Date')
+            rng = self._rng(f'{symbol}:{interval}:{day.date()}')
+            n = len(times)
+            close = row['Open'] * np.exp(np.cumsum(rng.normal(0, 0.012 / np.sqrt(n), n)))
+            open_ = np.concatenate([[row['Open']], close[:-1]])
+            spread = np.abs(rng.normal(0, 0.0005, n))
+            frames.append(pd.DataFrame({
+                'Close': close,
+                'High': np.maximum(open_, close) * (1 + spread),
+                'Low': np.minimum(open_, close) * (1 - spread),
+                'Open': open_,
+                'Volume': rng.integers(1_000, 500_000, n).astype(float)
+            }, index=times))
+
+        if not frames:
+            return _empty_frame()
+        df = pd.concat(frames)
+        df.columns.name = 'Price'
+        return df
+
+    def synthetic_fred(self, series_id, end):
+        freq = self.FRED_FREQUENCIES.get(series_id, 'MS')
+        dates = pd.date_range(self.ORIGIN, pd.Timestamp(end), freq=freq)
+        rng = self._rng(series_id)
+        level = 1 + 300 * rng.random()
+        values = level * np.exp(np.cumsum(rng.normal(0.001, 0.01, len(dates))))
+        return pd.Series(values, index=dates, name=series_id)
+
+    # Upstream delay and injected failures, once per call
+    def _call(self, what):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.errors:
+            with self._faults_lock:
+                failed = self._faults.random() < self.errors
+            if failed:
+                raise UpstreamError(f'injected failure fetching {what}')
+
+    def download(self, symbols, start, end, interval='1d'):
+        self._call(', '.join(symbols))
+
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        frames = {}
+        for symbol in symbols:
+            if interval != '1d':
+                frames[symbol] = self.synthetic_intraday(symbol, start, end, interval)
+                continue
+            df = self._recorded('prices', symbol)
+            if df is None:
+                df = self.synthetic_ohlcv(symbol, end)
+            frames[symbol] = df.loc[(df.index >= start) & (df.index < end)].copy()
+        return frames
+
+    def fred_series(self, series_id, start, end):
+        self._call(series_id)
+
+        series = self._recorded('fred', series_id)
+        if series is None:
+            series = self.synthetic_fred(series_id, end)
+        else:
+            series = series.iloc[:, 0]
+        return series.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+
+# Record a live fetch as fixtures for FixtureProvider(root=...)----------------------------
+def record_fixtures(root, symbols, series_ids, start, end, provider=None):
+    provider = provider or LiveProvider()
+    os.makedirs(os.path.join(root, 'prices'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'fred'), exist_ok=True)
+
+    for symbol, df in provider.download(list(symbols), start, end).items():
+        # A symbol that failed has no fixture; FixtureProvider synthesizes it instead
+        if isinstance(df, Exception):
+            continue
+        df.to_parquet(os.path.join(root, 'prices', quote(symbol, safe='') + '.parquet'))
+    for series_id in series_ids:
+        series = provider.fred_series(series_id, start, end)
+        series.to_frame(series_id).to_parquet(os.path.join(root, 'fred', quote(series_id, safe='') + '.parquet'))
+
+
+# Synthetic ticker universe of any size, for benchmarks and load tests---------------------
+def synthetic_universe(n_assets, prefix='SYN'):
+    return {f'{prefix} Asset {i:04d}': f'{prefix}{i:04d}' for i in range(n_assets)}
+
+
+# Active provider--------------------------------------------------------------------------
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _from_environment():
+    if os.environ.get('DATA_PROVIDER', 'live') == 'fixture':
+        return FixtureProvider(
+            root=os.environ.get('FIXTURE_DIR') or None,
+            seed=int(os.environ.get('FIXTURE_SEED', 0)),
+            latency=float(os.environ.get('FIXTURE_LATENCY', 0)),
+            missing=float(os.environ.get('FIXTURE_MISSING', 0)),
+            errors=float(os.environ.get('FIXTURE_ERRORS', 0))
+        )
+    return LiveProvider()
+
+
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _from_environment()
+        return _provider
+
+
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
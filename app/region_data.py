@@ -1,10 +1,13 @@
-import yfinance as yf
-import datetime as dt
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import streamlit as st
+from market_data import load_universe, HISTORY_START, history_end, INTRADAY_INTERVAL, intraday_start, period_label, index_period
+from cache import ttl_cache
+from panel import shared_panel
+from analytics import get_analytics
+from downsample import downsample
+from render_service import render_figures
+from figures import new_figure
+import vega
 
 # Regional market tickers----------------------------------------------------------------
 regional_INDEXES = {
@@ -17,35 +20,42 @@ regional_INDEXES = {
     "Emerging Markets (EEM)": "EEM"
 }
 
-# Fetch regional market data (2025 only), cached------------------------------------------------
-@st.cache_data(show_spinner=False)
+# Daily index closes
+CACHE_TTL = 60 * 60
+INTRADAY_TTL = 60
+
+# Fetch regional market history (pages query date ranges of it), cached--------------------------
+@ttl_cache(ttl=CACHE_TTL)
 def get_region_performance():
-    start = dt.date(2025, 1, 1)
-    end = dt.date(2025, 12, 31)
-
-    data = {}
-    for region, symbol in regional_INDEXES.items():
-        df = yf.download(symbol, start=start, end=end, auto_adjust=True)
-        df.columns = df.columns.droplevel(1) if isinstance(df.columns, pd.MultiIndex) else df.columns
-        df['Region'] = region
-        data[region] = df
-    return pd.concat(data)
-
-# Prepare close price data for analysis-------------------------------------------------------
-def prepare_data(data):
-    close_prices = data['Close'].unstack(level=0)
-    close_prices = close_prices.ffill().bfill()
-    return close_prices
+    return load_universe(regional_INDEXES, HISTORY_START, history_end(), label='Region', dataset='regions')
+
+# Shared read-only panel of the regional data (date x asset views, no per-session copy)
+def get_region_panel():
+    return shared_panel(get_region_performance)
+
+# Intraday bars for the last few days, cached----------------------------------------------
+@ttl_cache(ttl=INTRADAY_TTL)
+def get_region_intraday(interval=INTRADAY_INTERVAL):
+    return load_universe(regional_INDEXES, intraday_start(), history_end(), label='Region', interval=interval, dataset='regions')
+
+def get_region_intraday_panel():
+    return shared_panel(get_region_intraday)
+
+# Prepare close price data for analysis (gap-filled closes and their shared analytics)--------
+def prepare_data(panel):
+    return get_analytics(panel, fill=True)
 
 # Normalized cumulative performance----------------------------------------------------------
-def normalized_performance(data):
-    returns = data.pct_change().dropna()
-    cumulative_returns = (1 + returns).cumprod() * 100
+def normalized_performance(analytics, period=None):
+    cumulative_returns = analytics.cumulative
+    title = f'Regional Market Performance (Normalized, {period or index_period(analytics.close.index)})'
+    if vega.ENABLED:
+        return vega.line_chart(cumulative_returns, title, 'Date', 'Performance Index (Indexed to 100)')
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = new_figure(figsize=(12, 6))
     for col in cumulative_returns.columns:
         ax.plot(cumulative_returns.index, cumulative_returns[col], label=col)
-    ax.set_title('Regional Market Performance (Normalized, 2025)')
+    ax.set_title(title)
     ax.set_xlabel('Date')
     ax.set_ylabel('Performance Index (Indexed to 100)')
     ax.legend()
@@ -53,69 +63,130 @@ def normalized_performance(data):
     return fig
 
 # Annualized volatility-----------------------------------------------------------------------
-def annualized_volatility(data):
-    returns = data.pct_change().dropna()
-    volatility = returns.std() * np.sqrt(252)
-    volatility.sort_values(ascending=False, inplace=True)
+def annualized_volatility(analytics, period=None):
+    volatility = analytics.volatility.sort_values(ascending=False)
+    title = f'Annualized Volatility by Region ({period or index_period(analytics.close.index)})'
+    if vega.ENABLED:
+        return vega.bar_chart(volatility, title, 'Volatility (Std Dev)', (10, 5), color='skyblue')
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = new_figure(figsize=(10, 5))
     volatility.plot(kind='bar', color='skyblue', ax=ax)
-    ax.set_title('Annualized Volatility by Region (2025)')
+    ax.set_title(title)
     ax.set_ylabel('Volatility (Std Dev)')
     ax.grid(axis='y')
     return fig
 
 # Correlation heatmap--------------------------------------------------------------------------
-def correlation_matrix(data):
-    returns = data.pct_change().dropna()
-    corr_matrix = returns.corr()
+def correlation_matrix(analytics, period=None):
+    corr_matrix = analytics.correlation
+    title = f'Correlation Between Regional Markets ({period or index_period(analytics.close.index)})'
+    if vega.ENABLED:
+        return vega.heatmap(corr_matrix, title)
+    import seaborn as sns
+
     mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
 
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = new_figure(figsize=(8, 6))
     sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', fmt='.2f', mask=mask, ax=ax)
-    ax.set_title('Correlation Between Regional Markets (2025)')
+    ax.set_title(title)
+    return fig
+
+# Rolling correlation heatmap for the window ending on `date`----------------------------------
+def rolling_correlation_heatmap(analytics, date, window=60):
+    rolling = analytics.rolling_correlation(window)
+    corr_matrix = rolling.at(date)
+    title = f'{window}-Day Correlation Between Regional Markets (to {pd.Timestamp(date):%d %b %Y})'
+    if vega.ENABLED:
+        return vega.heatmap(corr_matrix, title, domain=(-1, 1))
+    import seaborn as sns
+
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+
+    fig, ax = new_figure(figsize=(8, 6))
+    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', fmt='.2f', mask=mask, vmin=-1, vmax=1, ax=ax)
+    ax.set_title(title)
+    return fig
+
+# Average pairwise rolling correlation over time------------------------------------------------
+def average_rolling_correlation(analytics, date=None, window=60, period=None):
+    average = analytics.rolling_correlation(window).average()
+    title = f'Average {window}-Day Correlation Across Regions ({period or index_period(analytics.close.index)})'
+    if vega.ENABLED:
+        return vega.line_chart(average.rename('Average'), title, 'Date', 'Mean Pairwise Correlation', (12, 4), rule=date)
+
+    fig, ax = new_figure(figsize=(12, 4))
+    ax.plot(average.index, average, color='tab:red')
+    if date is not None:
+        ax.axvline(pd.Timestamp(date), color='#111', linestyle='--', linewidth=1)
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Mean Pairwise Correlation')
+    ax.grid(True)
     return fig
 
 # Trading volume chart--------------------------------------------------------------------------
-def trading_volume(data, region):
+def trading_volume(data, region, period=None):
     region_data = data.xs(region)
-    fig, ax = plt.subplots(figsize=(12, 5))
+    title = f"{region} Trading Volume ({period or index_period(region_data.index)})"
+    if vega.ENABLED:
+        return vega.line_chart(region_data['Volume'], title, 'Date', 'Volume', (12, 5))
+    fig, ax = new_figure(figsize=(12, 5))
     ax.plot(region_data.index, region_data['Volume'])
-    ax.set_title(f"{region} Trading Volume (2025)")
+    ax.set_title(title)
     ax.set_xlabel('Date')
     ax.set_ylabel('Volume')
     return fig
 
 # Price trend with moving averages-------------------------------------------------------------
-def price_trends(data, region):
-    region_data = data[region]
-    df = pd.DataFrame({'Close': region_data})
-    df['MA30'] = df['Close'].rolling(30).mean()
-    df['MA90'] = df['Close'].rolling(90).mean()
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(df.index, df['Close'], label='Close', alpha=0.8)
-    ax.plot(df.index, df['MA30'], label='30-Day MA', linestyle='--')
-    ax.plot(df.index, df['MA90'], label='90-Day MA', linestyle='--')
-    ax.set_title(f'{region} - Price Trend with Moving Averages (2025)')
+def price_trends(analytics, region, period=None, unit='Day'):
+    return _price_trend_chart(analytics.close[region], region, period, unit)
+
+# Intraday bars are charted per market, without filling: the exchanges trade at different
+# hours, so filling over the union of their timestamps would draw flat segments while a market
+# is closed and run the moving averages over other markets' bars.
+def intraday_price_trends(panel, region, period='Intraday, 5-minute bars'):
+    return _price_trend_chart(panel.asset(region)['Close'], region, period, 'Bar')
+
+def _price_trend_chart(close, region, period, unit):
+    period = period or index_period(close.index)
+    ma30 = downsample(close.rolling(30).mean())
+    ma90 = downsample(close.rolling(90).mean())
+    close = downsample(close)
+    if vega.ENABLED:
+        lines = pd.concat({'Close': close, f'30-{unit} MA': ma30, f'90-{unit} MA': ma90}, axis=1)
+        return vega.line_chart(lines, f'{region} - Price Trend with Moving Averages ({period})', 'Date',
+                               'Price (USD)', dashed=(f'30-{unit} MA', f'90-{unit} MA'))
+
+    fig, ax = new_figure(figsize=(12, 6))
+    ax.plot(close.index, close, label='Close', alpha=0.8)
+    ax.plot(ma30.index, ma30, label=f'30-{unit} MA', linestyle='--')
+    ax.plot(ma90.index, ma90, label=f'90-{unit} MA', linestyle='--')
+    ax.set_title(f'{region} - Price Trend with Moving Averages ({period})')
     ax.set_xlabel('Date')
     ax.set_ylabel('Price (USD)')
     ax.legend()
     ax.grid(True)
     return fig
 
-# Run full regional analysis------------------------------------------------------------------
-def run_region_analysis():
+# Run full regional analysis (charts rendered in parallel, as cached PNG bytes)-----------------
+def run_region_analysis(start=None, end=None):
     data = get_region_performance()
-    close_data = prepare_data(data)
+    panel = get_region_panel().query(start, end)
+    analytics = prepare_data(panel)
+    period = period_label(start or panel.dates[0], end or panel.dates[-1])
 
-    normalized = normalized_performance(close_data)
-    volatility = annualized_volatility(close_data)
-    corr_matrix = correlation_matrix(close_data)
+    normalized, volatility, corr_matrix = render_figures([
+        (normalized_performance, (analytics, period)),
+        (annualized_volatility, (analytics, period)),
+        (correlation_matrix, (analytics, period))
+    ])
 
     return {
         'data': data,
-        'close': close_data,
+        'panel': panel,
+        'close': analytics.close,
+        'analytics': analytics,
+        'period': period,
         'normalized': normalized,
         'volatility': volatility,
         'correlation': corr_matrix
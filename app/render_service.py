@@ -0,0 +1,256 @@
+import os
+import sys
+import types
+import atexit
+import logging
+import importlib
+import threading
+from collections import OrderedDict
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.context import SpawnContext, SpawnProcess
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from analytics import Analytics
+from panel import PricePanel
+from figure_cache import figure_cache, data_version, render_bytes
+import vega
+
+logger = logging.getLogger(__name__)
+
+# Parallel chart rendering--------------------------------------------------------------------
+# matplotlib holds the GIL while it draws, so charts rendered from threads still run one
+# after another. render_figures() sends independent chart jobs to a pool of worker processes
+# instead, so a multi-chart page takes about as long as its slowest chart.
+#   - A job is (chart function, args, kwargs); the function must be importable by name.
+#   - PricePanel, Analytics and numeric DataFrame arguments travel as shared-memory arrays:
+#     each dataset version is copied into shared memory once and workers map it, so only
+#     index labels and a block name are pickled per job.
+#   - Results go through the figure cache, so only charts that changed are sent to the pool.
+# RENDER_WORKERS=0 renders in-process (the default on single-core machines). Vega-Lite specs
+# (CHART_BACKEND=vega) are cheap to build and always made in-process.
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', min(4, (os.cpu_count() or 1) - 1)))
+
+# Dataset versions kept in shared memory (oldest idle blocks are unlinked first)
+SHARED_VERSIONS = 8
+
+
+# Shared-memory transport-------------------------------------------------------------------
+# A shared argument is described by a small picklable tuple:
+#   ('panel', block, shape, dtype, assets, dates, fields, tickers, name)
+#   ('analytics', block, shape, dtype, assets, dates)
+#   ('frame', block, shape, dtype, columns, dates)
+# Each block counts the submitted jobs that use it. A block is unlinked only once it is past
+# SHARED_VERSIONS and no pending job holds it, so a job queued by another session can still
+# attach it.
+_shared = OrderedDict()
+_shared_lock = threading.Lock()
+
+
+def _to_shared(values):
+    values = np.ascontiguousarray(values)
+    block = SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+    return block
+
+
+def _describe(value):
+    if isinstance(value, PricePanel):
+        block = _to_shared(value.values)
+        return block, ('panel', block.name, value.values.shape, value.values.dtype.str,
+                       value.assets, value.dates.asi8, value.fields, value.tickers, value.name)
+    if isinstance(value, Analytics):
+        close = value.close.to_numpy()
+        block = _to_shared(close)
+        return block, ('analytics', block.name, close.shape, close.dtype.str,
+                       list(value.close.columns), value.close.index.asi8)
+    values = value.to_numpy()
+    block = _to_shared(values)
+    return block, ('frame', block.name, values.shape, values.dtype.str,
+                   list(value.columns), value.index.asi8)
+
+
+def _is_shared(value):
+    if isinstance(value, (PricePanel, Analytics)):
+        return True
+    return (
+        isinstance(value, pd.DataFrame) and isinstance(value.index, pd.DatetimeIndex)
+        and all(np.issubdtype(dtype, np.number) for dtype in value.dtypes)
+    )
+
+
+# Descriptor for a job argument; the key of each block it holds is appended to keys
+def _share(value, keys):
+    if not _is_shared(value):
+        return value
+    key = data_version(value)
+    with _shared_lock:
+        entry = _shared.get(key)
+        if entry is None:
+            block, descriptor = _describe(value)
+            entry = _shared[key] = [block, descriptor, 0]
+        _shared.move_to_end(key)
+        entry[2] += 1
+        keys.append(key)
+        _evict()
+        return entry[1]
+
+
+# Done callback of a submitted job: drop its hold on the blocks it was given
+def _release(keys, future=None):
+    with _shared_lock:
+        for key in keys:
+            _shared[key][2] -= 1
+        _evict()
+
+
+def _evict():
+    excess = len(_shared) - SHARED_VERSIONS
+    if excess <= 0:
+        return
+    idle = [key for key, (_, _, pending) in _shared.items() if not pending][:excess]
+    for key in idle:
+        block = _shared.pop(key)[0]
+        block.close()
+        block.unlink()
+
+
+@atexit.register
+def _unlink_shared():
+    with _shared_lock:
+        while _shared:
+            _, (block, _, _) = _shared.popitem()
+            block.close()
+            block.unlink()
+
+
+# Worker side: attached blocks and the objects rebuilt from them, kept per block name
+_attached = OrderedDict()
+
+
+def _rebuild(descriptor):
+    if not (isinstance(descriptor, tuple) and descriptor and descriptor[0] in ('panel', 'analytics', 'frame')):
+        return descriptor
+
+    kind, name, shape, dtype = descriptor[:4]
+    if name in _attached:
+        _attached.move_to_end(name)
+        return _attached[name][1]
+
+    # Spawned workers report to the parent's resource tracker, so attaching adds no owner
+    block = SharedMemory(name=name)
+    values = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    values.flags.writeable = False
+    if kind == 'panel':
+        assets, dates, fields, tickers, panel_name = descriptor[4:]
+        value = PricePanel(assets, pd.DatetimeIndex(dates), fields, values, tickers, panel_name)
+    else:
+        columns, dates = descriptor[4:]
+        frame = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'), columns=pd.Index(columns), copy=False)
+        value = Analytics(frame) if kind == 'analytics' else frame
+
+    _attached[name] = (block, value)
+    while len(_attached) > SHARED_VERSIONS:
+        _, (old, _) = _attached.popitem(last=False)
+        try:
+            old.close()
+        except BufferError:
+            # Still referenced by a rebuilt object; the mapping goes when that is collected
+            pass
+    return value
+
+
+def _render_job(module, qualname, args, kwargs, fmt):
+    func = importlib.import_module(module)
+    for part in qualname.split('.'):
+        func = getattr(func, part)
+    args = [_rebuild(arg) for arg in args]
+    kwargs = {key: _rebuild(arg) for key, arg in kwargs.items()}
+    return render_bytes(func(*args, **kwargs), fmt)
+
+
+# Pool--------------------------------------------------------------------------------------
+# Workers are spawned (they inherit sys.path), never forked from the multi-threaded server
+# process. A spawned process runs the parent's __main__ file again while it starts, and under
+# `streamlit run` that is the page being rendered, so workers are started while __main__ is
+# swapped for an empty module.
+_pool = None
+_pool_lock = threading.Lock()
+_spawn_lock = threading.Lock()
+
+
+class _WorkerProcess(SpawnProcess):
+    def start(self):
+        with _spawn_lock:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                super().start()
+            finally:
+                sys.modules['__main__'] = main
+
+
+class _WorkerContext(SpawnContext):
+    Process = _WorkerProcess
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_WorkerContext())
+        return _pool
+
+
+# A pool whose worker died cannot take jobs any more; the next render starts a new one
+def _drop_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Render jobs without the cache; workers=0 renders in this process
+def render_all(jobs, fmt='png', workers=None):
+    workers = RENDER_WORKERS if workers is None else workers
+    jobs = [(func, tuple(args), dict(kwargs)) for func, args, kwargs in jobs]
+    if workers <= 0 or len(jobs) < 2 or vega.ENABLED:
+        return _render_here(jobs, fmt)
+
+    pool = _get_pool(workers)
+    try:
+        return _render_in_pool(pool, jobs, fmt)
+    except BrokenProcessPool as e:
+        logger.warning("Render workers failed (%s), rendering in this process", e)
+        _drop_pool(pool)
+        return _render_here(jobs, fmt)
+
+
+def _render_here(jobs, fmt):
+    return [render_bytes(func(*args, **kwargs), fmt) for func, args, kwargs in jobs]
+
+
+def _render_in_pool(pool, jobs, fmt):
+    futures = []
+    for func, args, kwargs in jobs:
+        keys = []
+        try:
+            future = pool.submit(
+                _render_job, func.__module__, func.__qualname__,
+                [_share(arg, keys) for arg in args], {key: _share(arg, keys) for key, arg in kwargs.items()}, fmt
+            )
+        except BaseException:
+            _release(keys)
+            raise
+        future.add_done_callback(partial(_release, keys))
+        futures.append(future)
+    return [future.result() for future in futures]
+
+
+# Rendered bytes for each (func, args[, kwargs]) job, from the figure cache where possible------
+def render_figures(jobs, fmt='png'):
+    jobs = [(job[0], tuple(job[1]), dict(job[2]) if len(job) > 2 else {}) for job in jobs]
+    return figure_cache.render_many(jobs, fmt, lambda missing: render_all(missing, fmt))
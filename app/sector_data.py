@@ -1,8 +1,10 @@
-import yfinance as yf
 import pandas as pd
-import datetime as dt
-import matplotlib.pyplot as plt
-import streamlit as st
+from market_data import load_universe, HISTORY_START, history_end
+from cache import ttl_cache
+from panel import shared_panel
+from analytics import get_analytics
+from figures import new_figure
+import vega
 
 sector_ETFS = {
 	'Technology':'XLK',
@@ -16,56 +18,65 @@ sector_ETFS = {
 	'Real Estate':'XLRE',
 	'Communication':'XLC'
 	}
+
+# Daily ETF closes
+CACHE_TTL = 60 * 60
 	
-@st.cache_data(show_spinner=False)
+@ttl_cache(ttl=CACHE_TTL)
 def get_sector_performance():
-	end = "2025-12-31"
-	start = "2025-01-01"
-
-	data = {}
-	for sector, ticker in sector_ETFS.items():
-		df = yf.download(ticker, start=start, end=end, auto_adjust=True)
-		df.columns = df.columns.droplevel(1)
-		df['Sector'] = sector
-		data[sector] = df
-	return pd.concat(data)
+	return load_universe(sector_ETFS, HISTORY_START, history_end(), label='Sector', dataset='sectors')
 
-@st.cache_data(show_spinner=False)
-def prepare_data(data):
-	close_price = data['Close'].unstack(level=0)
+# Shared read-only panel of the sector data (date x asset views, no per-session copy)
+def get_sector_panel():
+	return shared_panel(get_sector_performance)
 
-	return close_price.pct_change().dropna()
+# Shared analytics (returns, cumulative index, volatility) for the sector panel
+def prepare_data(panel):
+	return get_analytics(panel)
 
-def cumulative_sector_performance(data):
-	cumulative = (1 + data).cumprod() * 100
+def cumulative_sector_performance(analytics):
+	cumulative = analytics.cumulative
+	if vega.ENABLED:
+		return vega.line_chart(cumulative, 'Cumulative Sector Performance', None)
 
+	fig, ax = new_figure(figsize=(12, 6))
 	for i in cumulative.columns:
-		plt.plot(cumulative.index, cumulative[i], label=i)
-	plt.title('Cumulative Sector Performance')
-	plt.legend()
-	plt.grid(True)
+		ax.plot(cumulative.index, cumulative[i], label=i)
+	ax.set_title('Cumulative Sector Performance')
+	ax.legend()
+	ax.grid(True)
+	return fig
 	
 
-def volatility(data):
-	volatility = data.std() * (252 ** 0.5)
+def volatility(analytics):
+	volatility = analytics.volatility
+	if vega.ENABLED:
+		return vega.bar_chart(volatility.sort_values(ascending=False), 'Annualized Volatility by Sector', 'Volatility')
 
-	volatility.sort_values(ascending=False).plot(kind='bar', figsize=(12,6))
-	plt.title('Annualized Volatility by Sector')
-	plt.ylabel('Volatility')
-	plt.grid(axis='y')
+	fig, ax = new_figure(figsize=(12, 6))
+	volatility.sort_values(ascending=False).plot(kind='bar', ax=ax)
+	ax.set_title('Annualized Volatility by Sector')
+	ax.set_ylabel('Volatility')
+	ax.grid(axis='y')
+	return fig
 	
 
-def trend_analysis(data, sector):
-	sector_trend = data.loc[sector]
-	sector_trend['MA30'] = sector_trend['Close'].rolling(30).mean()
-	sector_trend['MA90'] = sector_trend['Close'].rolling(90).mean()
+def trend_analysis(panel, sector):
+	close = panel.asset(sector)['Close']
+	ma30 = close.rolling(30).mean()
+	ma90 = close.rolling(90).mean()
+	if vega.ENABLED:
+		lines = pd.concat({'Close': close, '30-Day MA': ma30, '90-Day MA': ma90}, axis=1)
+		return vega.line_chart(lines, f'{sector} Trend Analysis', None, dashed=('30-Day MA', '90-Day MA'))
 
-	plt.plot(sector_trend['Close'], label='Close', alpha=0.7)
-	plt.plot(sector_trend['MA30'], label='30-Day MA', linestyle='--')
-	plt.plot(sector_trend['MA90'], label='90-Day MA', linestyle='--')
-	plt.title(f'{sector} Trend Analysis')
-	plt.legend()
-	plt.grid(True)
+	fig, ax = new_figure(figsize=(12, 6))
+	ax.plot(close, label='Close', alpha=0.7)
+	ax.plot(ma30, label='30-Day MA', linestyle='--')
+	ax.plot(ma90, label='90-Day MA', linestyle='--')
+	ax.set_title(f'{sector} Trend Analysis')
+	ax.legend()
+	ax.grid(True)
+	return fig
 	
 
 
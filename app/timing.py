@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import functools
+import threading
+
+# Per-stage timing spans----------------------------------------------------------------------
+# TIMING=log    every span is written to the `timing` logger as one JSON record:
+#               {"ts", "run", "page", "stage", "name", "ms", "cache", "depth", "thread"}
+#               (to stderr, or to the file named by TIMING_LOG_FILE);
+# TIMING=panel  the same, plus a sidebar panel with the current rerun's breakdown.
+# Stages are fetch (loaders, downloads), compute (panels, analytics, summaries) and render
+# (charts). A span can be annotated with its cache outcome (hit, miss or stale).
+# Unset, span() hands back one shared no-op object and timed() returns the function itself,
+# so instrumented code pays a function call at most.
+MODE = os.environ.get('TIMING', '')
+ENABLED = MODE in ('log', 'panel')
+PANEL = MODE == 'panel'
+
+logger = logging.getLogger('timing')
+if ENABLED and not logger.handlers:
+    path = os.environ.get('TIMING_LOG_FILE')
+    handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Spans of the script run on this thread (Streamlit runs each rerun on its own thread)
+_local = threading.local()
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def annotate(self, cache):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ('stage', 'name', 'cache', 'depth', 'started', 'ms')
+
+    def __init__(self, stage, name):
+        self.stage = stage
+        self.name = name
+        self.cache = None
+        self.ms = None
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.started) * 1000
+        _stack().pop()
+        run = getattr(_local, 'run', None)
+        record = {
+            'ts': round(time.time() - self.ms / 1000, 6),
+            'run': run['id'] if run else None,
+            'page': run['page'] if run else None,
+            'stage': self.stage,
+            'name': self.name,
+            'ms': round(self.ms, 3),
+            'cache': self.cache,
+            'depth': self.depth,
+            'thread': threading.current_thread().name
+        }
+        if run:
+            run['records'].append(record)
+        logger.info(json.dumps(record))
+        return False
+
+    def annotate(self, cache):
+        self.cache = cache
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def span(stage, name):
+    if not ENABLED:
+        return _NO_SPAN
+    return Span(stage, name)
+
+
+# Record the cache outcome on the innermost open span of this thread
+def annotate(cache):
+    if ENABLED:
+        stack = _stack()
+        if stack:
+            stack[-1].cache = cache
+
+
+# Decorator: time every call of a function as a span of `stage`
+def timed(stage, name=None):
+    def decorator(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(stage, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Page hooks--------------------------------------------------------------------------------
+# start_run() at the top of a page script opens the rerun's trace; debug_panel() at the end
+# shows it in the sidebar when TIMING=panel, with the memory held by each loaded dataset.
+def start_run(page):
+    if ENABLED:
+        _local.run = {'id': uuid.uuid4().hex[:8], 'page': page, 'records': [], 'started': time.perf_counter()}
+        _local.stack = []
+
+
+def debug_panel():
+    run = getattr(_local, 'run', None)
+    if not PANEL or run is None:
+        return
+    import streamlit as st
+
+    total = (time.perf_counter() - run['started']) * 1000
+    # In call order, nested spans indented under the span they ran in
+    records = sorted(run['records'], key=lambda record: record['ts'])
+    with st.sidebar.expander('Timings', expanded=True):
+        st.caption(f"Rerun {run['id']}: {total:.0f} ms")
+        by_stage = {}
+        for record in run['records']:
+            if record['depth'] == 0:
+                by_stage[record['stage']] = by_stage.get(record['stage'], 0) + record['ms']
+        st.caption(' · '.join(f'{stage} {ms:.0f} ms' for stage, ms in by_stage.items()))
+        st.dataframe(
+            [
+                {'stage': r['stage'], 'name': '  ' * r['depth'] + r['name'], 'ms': round(r['ms'], 1), 'cache': r['cache'] or ''}
+                for r in records
+            ],
+            hide_index=True
+        )
+        # market_data.memory_report, if the loaders have run in this process
+        market_data = sys.modules.get('market_data')
+        report = getattr(market_data, 'memory_report', None)
+        if report:
+            st.caption('Memory per dataset')
+            st.dataframe(
+                [
+                    {'dataset': dataset, 'before MB': round(sizes['before'] / 1e6, 2), 'after MB': round(sizes['after'] / 1e6, 2)}
+                    for dataset, sizes in sorted(report.items())
+                ],
+                hide_index=True
+            )
@@ -0,0 +1,133 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from downsample import downsample
+
+# Client-side chart backend-------------------------------------------------------------------
+# With CHART_BACKEND=vega the chart functions return Vega-Lite specs instead of matplotlib
+# figures, and the browser draws them. Nothing is rasterized on the server; the cost of a chart
+# is building its data payload, which is kept small:
+#   - every line is downsampled to at most MAX_POINTS (LTTB) before it is serialized;
+#   - points inside a flat run are dropped (the line through them is unchanged);
+#   - values are rounded to DIGITS significant digits, dates written as short ISO strings;
+#   - rows use one-letter keys (d: date, s: series, v: value) and a series is sent as its
+#     position in the legend, mapped back to its name by a transform in the spec.
+# Specs are plain dicts, so they go through the figure cache like rendered PNGs do.
+ENABLED = os.environ.get('CHART_BACKEND', 'matplotlib') == 'vega'
+
+# A browser chart is a few hundred pixels wide, so lines need fewer points than for a PNG
+MAX_POINTS = 600
+DIGITS = 6
+PIXELS_PER_INCH = 50
+
+
+def _round(values):
+    return [float(f'{v:.{DIGITS}g}') for v in values]
+
+
+def _dates(index):
+    index = pd.DatetimeIndex(index)
+    fmt = '%Y-%m-%d' if (index == index.normalize()).all() else '%Y-%m-%dT%H:%M'
+    return index.strftime(fmt).tolist()
+
+
+# Drop points whose neighbours on both sides have the same value
+def _dedupe(series):
+    values = series.to_numpy()
+    if len(values) < 3:
+        return series
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:-1] = ~((values[1:-1] == values[:-2]) & (values[1:-1] == values[2:]))
+    return series[keep]
+
+
+def line_rows(frame):
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame(frame.name or 'value')
+    rows = []
+    for i, name in enumerate(frame.columns):
+        line = _dedupe(downsample(frame[name], MAX_POINTS))
+        rows += [{'d': d, 's': i, 'v': v} for d, v in zip(_dates(line.index), _round(line))]
+    return [str(name) for name in frame.columns], rows
+
+
+def _base(title, figsize):
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'title': title,
+        'width': 'container',
+        'height': int(figsize[1] * PIXELS_PER_INCH)
+    }
+
+
+# Lines of every column of a date-indexed frame (or one Series); `dashed` names dashed series,
+# `rule` draws a vertical marker at that date
+def line_chart(frame, title, x_title='Date', y_title=None, figsize=(12, 6), dashed=(), rule=None):
+    names, rows = line_rows(frame)
+    line = {
+        'mark': {'type': 'line', 'strokeWidth': 1.5},
+        'encoding': {
+            'x': {'field': 'd', 'type': 'temporal', 'title': x_title},
+            'y': {'field': 'v', 'type': 'quantitative', 'title': y_title, 'scale': {'zero': False}},
+            'color': {'field': 'series', 'type': 'nominal', 'title': None, 'sort': names},
+            'strokeDash': {
+                'condition': {'test': {'field': 'series', 'oneOf': list(dashed)}, 'value': [6, 4]},
+                'value': [1, 0]
+            },
+            'tooltip': [{'field': 'series'}, {'field': 'd', 'type': 'temporal'}, {'field': 'v'}]
+        }
+    }
+    spec = _base(title, figsize)
+    spec['data'] = {'values': rows}
+    spec['transform'] = [{'calculate': f'{json.dumps(names)}[datum.s]', 'as': 'series'}]
+    if rule is None:
+        spec.update(line)
+    else:
+        marker = {
+            'data': {'values': [{'d': _dates([pd.Timestamp(rule)])[0]}]},
+            'mark': {'type': 'rule', 'color': '#111', 'strokeDash': [4, 4]},
+            'encoding': {'x': {'field': 'd', 'type': 'temporal'}}
+        }
+        spec['layer'] = [line, marker]
+    return spec
+
+
+# One bar per index label, in the series' order
+def bar_chart(series, title, y_title=None, figsize=(12, 6), color=None):
+    spec = _base(title, figsize)
+    spec['data'] = {'values': [{'s': str(k), 'v': v} for k, v in zip(series.index, _round(series))]}
+    spec['mark'] = {'type': 'bar', **({'color': color} if color else {})}
+    spec['encoding'] = {
+        'x': {'field': 's', 'type': 'nominal', 'sort': None, 'title': None},
+        'y': {'field': 'v', 'type': 'quantitative', 'title': y_title},
+        'tooltip': [{'field': 's'}, {'field': 'v'}]
+    }
+    return spec
+
+
+# Annotated heatmap of a square matrix, lower triangle only (like a seaborn heatmap with
+# mask=np.triu(...))
+def heatmap(matrix, title, figsize=(8, 6), domain=None):
+    labels = [str(label) for label in matrix.index]
+    values = matrix.to_numpy(dtype=np.float64)
+    rows = [
+        {'x': labels[j], 'y': labels[i], 'v': _round([values[i, j]])[0]}
+        for i in range(len(labels)) for j in range(i)
+        if not np.isnan(values[i, j])
+    ]
+    scale = {'scheme': 'redblue', 'reverse': True}
+    if domain is not None:
+        scale['domain'] = list(domain)
+
+    spec = _base(title, figsize)
+    spec['data'] = {'values': rows}
+    spec['encoding'] = {
+        'x': {'field': 'x', 'type': 'nominal', 'sort': labels[:-1], 'title': None},
+        'y': {'field': 'y', 'type': 'nominal', 'sort': labels[1:], 'title': None}
+    }
+    spec['layer'] = [
+        {'mark': 'rect', 'encoding': {'color': {'field': 'v', 'type': 'quantitative', 'scale': scale, 'title': None}}},
+        {'mark': {'type': 'text', 'fontSize': 11}, 'encoding': {'text': {'field': 'v', 'format': '.2f'}}}
+    ]
+    return spec
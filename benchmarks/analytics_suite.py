@@ -0,0 +1,314 @@
+"""Scaling benchmark for the analytics and chart functions, on synthetic data.
+
+Generates OHLCV panels of 10, 100 and 1,000 assets (--sizes) over --years of history, with one
+of the missing-data patterns below, and as many FRED-like indicator series of mixed frequency
+(monthly, business-daily, quarterly, weekly) merged the way get_economic_snapshot merges them.
+On each it times compute_summary, both prepare_data functions and every chart function
+(building the figure and rendering it to PNG, or the Vega-Lite spec to JSON with
+--backend vega). Every call gets a fresh panel and analytics built outside the timing, so the
+numbers are the cost of the first view of a new dataset version, lazily derived data included.
+
+A function that raises (a MemoryError, say) is recorded as failed at that size. A function whose
+cost grows with the number of assets is not run at a size where its single call would take
+longer than --budget seconds, going by its time at the previous size scaled linearly (a lower
+bound for most of them); single-asset charts are measured at every size.
+
+Results are written as JSON (--output). Given a baseline (--compare), the functions whose median
+time grew by more than --threshold are listed and the script exits with status 1:
+
+    python benchmarks/analytics_suite.py --output base.json
+    python benchmarks/analytics_suite.py --output new.json --compare base.json
+    python benchmarks/analytics_suite.py --compare base.json --against new.json   # no new run
+
+Missing-data patterns (--missing, with --fraction):
+  none     every asset has every business day
+  random   each bar is dropped with probability `fraction`
+  late     a `fraction` of the assets list part-way through the first half of the history
+  gaps     every asset has one contiguous hole covering `fraction` of its history
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+END = pd.Timestamp('2025-12-31')
+MISSING = ('none', 'random', 'late', 'gaps')
+
+# Release frequencies cycled through by the synthetic indicators (the first one sets the dates
+# the others are aligned to, as CPI does for the FRED snapshot)
+FRED_FREQUENCIES = ['MS', 'B', 'QS', 'W-FRI']
+
+
+# Synthetic data--------------------------------------------------------------------------------
+def _provider(years, seed, missing=0.0):
+    from providers import FixtureProvider
+
+    provider = FixtureProvider(seed=seed, missing=missing)
+    provider.ORIGIN = END - pd.DateOffset(years=years)
+    return provider
+
+
+# Long (name, Date) OHLCV frame of `n_assets` synthetic assets, as load_universe returns
+def synthetic_prices(n_assets, years=5, missing='random', fraction=0.05, seed=0):
+    from providers import synthetic_universe
+
+    provider = _provider(years, seed, fraction if missing == 'random' else 0.0)
+    tickers = synthetic_universe(n_assets)
+    frames = provider.download(list(tickers.values()), provider.ORIGIN, END + pd.Timedelta(days=1))
+    rng = np.random.default_rng(seed)
+
+    data = {}
+    for name, symbol in tickers.items():
+        df = frames[symbol]
+        n = len(df)
+        if missing == 'late' and rng.random() < fraction:
+            df = df.iloc[rng.integers(1, n // 2):]
+        elif missing == 'gaps':
+            width = int(n * fraction)
+            start = rng.integers(0, n - width)
+            df = pd.concat([df.iloc[:start], df.iloc[start + width:]])
+        df.index.name = 'Date'
+        df['Ticker'] = symbol
+        df['Name'] = name
+        data[name] = df
+    return pd.concat(data)
+
+
+# FRED-like snapshot of `n_series` indicators of mixed frequency, on the first one's dates
+def synthetic_indicators(n_series, years=5, seed=0):
+    provider = _provider(years, seed)
+    series = {}
+    for i in range(n_series):
+        series_id = f'IND{i:04d}'
+        provider.FRED_FREQUENCIES = {series_id: FRED_FREQUENCIES[i % len(FRED_FREQUENCIES)]}
+        series[f'Indicator {i:04d}'] = provider.fred_series(series_id, provider.ORIGIN, END)
+
+    first = next(iter(series.values()))
+    data = pd.concat(series, axis=1).reindex(first.index)
+    data.index = pd.to_datetime(data.index)
+    return data
+
+
+class Dataset:
+    def __init__(self, n_assets, years, missing, fraction, seed):
+        from panel import PricePanel
+
+        self.data = synthetic_prices(n_assets, years, missing, fraction, seed)
+        self.panel = PricePanel.from_long(self.data)
+        self.indicators = synthetic_indicators(n_assets, years, seed)
+        self.first = self.panel.assets[0]
+        # End of the last 60-day window (the last date with a return for every asset)
+        self.last_window = self.analytics(fill=True).returns.index[-1]
+
+    # A new panel over the same arrays: analytics and queries start uncached
+    def fresh_panel(self):
+        from panel import PricePanel
+
+        panel = self.panel
+        return PricePanel(panel.assets, panel.dates, panel.fields, panel.values, panel.tickers)
+
+    # Analytics with nothing derived yet (get_analytics would build the running statistics up
+    # front, outside the timing)
+    def analytics(self, fill=False):
+        from analytics import Analytics
+
+        close = self.fresh_panel().field('Close')
+        return Analytics(close.ffill().bfill() if fill else close)
+
+
+# Cases: (name, function, args for one call, is_chart, scales with the asset count)--------------
+def cases():
+    import commodities
+    import region_data
+    import sector_data
+    import economic_conditions as economic
+
+    return [
+        ('commodities.compute_summary', commodities.compute_summary, lambda d: (d.analytics(),), False, True),
+        ('region_data.prepare_data', region_data.prepare_data, lambda d: (d.fresh_panel(),), False, True),
+        ('sector_data.prepare_data', sector_data.prepare_data, lambda d: (d.fresh_panel(),), False, True),
+
+        ('commodities.commodity_correlation', commodities.commodity_correlation, lambda d: (d.analytics(),), True, True),
+        ('commodities.plot_normalized', commodities.plot_normalized, lambda d: (d.analytics(),), True, True),
+        ('commodities.price_chart', commodities.price_chart, lambda d: (d.fresh_panel(), d.first), True, False),
+        ('commodities.plot_price', commodities.plot_price, lambda d: (d.fresh_panel(),), True, True),
+        ('commodities.moving_average_chart', commodities.moving_average_chart, lambda d: (d.fresh_panel(), d.first), True, False),
+        ('commodities.plot_moving_averages', commodities.plot_moving_averages, lambda d: (d.fresh_panel(),), True, True),
+
+        ('region_data.normalized_performance', region_data.normalized_performance, lambda d: (d.analytics(True),), True, True),
+        ('region_data.annualized_volatility', region_data.annualized_volatility, lambda d: (d.analytics(True),), True, True),
+        ('region_data.correlation_matrix', region_data.correlation_matrix, lambda d: (d.analytics(True),), True, True),
+        ('region_data.rolling_correlation_heatmap', region_data.rolling_correlation_heatmap,
+         lambda d: (d.analytics(True), d.last_window), True, True),
+        ('region_data.average_rolling_correlation', region_data.average_rolling_correlation,
+         lambda d: (d.analytics(True), d.last_window), True, True),
+        ('region_data.trading_volume', region_data.trading_volume, lambda d: (d.data, d.first), True, True),
+        ('region_data.price_trends', region_data.price_trends, lambda d: (d.analytics(True), d.first), True, False),
+
+        ('sector_data.cumulative_sector_performance', sector_data.cumulative_sector_performance,
+         lambda d: (d.analytics(),), True, True),
+        ('sector_data.volatility', sector_data.volatility, lambda d: (d.analytics(),), True, True),
+        ('sector_data.trend_analysis', sector_data.trend_analysis, lambda d: (d.fresh_panel(), d.first), True, False),
+
+        ('economic_conditions.economic_indicators_raw', economic.economic_indicators_raw,
+         lambda d: (d.indicators, d.indicators.columns[0]), True, False),
+        ('economic_conditions.economic_indicators_normalized', economic.economic_indicators_normalized,
+         lambda d: (d.indicators,), True, True),
+    ]
+
+
+def measure(func, make_args, is_chart, repeat, budget):
+    from figure_cache import render_bytes
+
+    times = []
+    while len(times) < repeat and sum(times) < budget:
+        args = make_args()
+        started = time.perf_counter()
+        result = func(*args)
+        if is_chart:
+            render_bytes(result)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def run(args):
+    import vega
+
+    vega.ENABLED = args.backend == 'vega'
+    results, previous = {}, {}
+    for n_assets in args.sizes:
+        started = time.perf_counter()
+        dataset = Dataset(n_assets, args.years, args.missing, args.fraction, args.seed)
+        print(f'# {n_assets} assets, {len(dataset.panel.dates)} dates '
+              f'(generated in {time.perf_counter() - started:.1f} s)', flush=True)
+
+        for name, func, make_args, is_chart, scales in cases():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            key = f'{name}@{n_assets}'
+            if scales and name in previous:
+                size, seconds = previous[name]
+                if seconds * n_assets / size > args.budget:
+                    results[key] = {'function': name, 'assets': n_assets,
+                                    'skipped': f'over budget ({seconds:.1f} s at {size} assets)'}
+                    print(f'{key:<60} {"skipped":>13}', flush=True)
+                    continue
+
+            try:
+                times = measure(func, lambda: make_args(dataset), is_chart, args.repeat, args.budget)
+            except Exception as e:
+                # Recorded (e.g. a MemoryError at 1,000 assets); if it scales, not retried at larger sizes
+                results[key] = {'function': name, 'assets': n_assets, 'error': f'{type(e).__name__}: {e}'}
+                previous[name] = (n_assets, float('inf'))
+                print(f'{key:<60} {"failed":>13}  {type(e).__name__}', flush=True)
+                continue
+            previous[name] = (n_assets, times[0])
+            results[key] = {
+                'function': name,
+                'assets': n_assets,
+                'median_ms': round(statistics.median(times) * 1e3, 3),
+                'min_ms': round(min(times) * 1e3, 3),
+                'runs': len(times)
+            }
+            print(f"{key:<60} {results[key]['median_ms']:>10.1f} ms", flush=True)
+    return results
+
+
+def metadata(args):
+    import matplotlib
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'settings': {name: value for name, value in vars(args).items()
+                     if name not in ('output', 'compare', 'against')}
+    }
+
+
+# Settings that change what is measured; results only compare well when they match
+DATA_SETTINGS = ['years', 'missing', 'fraction', 'seed', 'backend']
+
+
+# Functions slower than the baseline by more than `threshold` (a ratio of median times)
+def compare(baseline, current, threshold):
+    settings = [baseline['meta']['settings'], current['meta']['settings']]
+    differ = [name for name in DATA_SETTINGS if settings[0].get(name) != settings[1].get(name)]
+    if differ:
+        print(f"Warning: the runs used different {', '.join(differ)}")
+
+    regressions = []
+    print(f"{'function':<60} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for key, new in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None or 'median_ms' not in old or 'median_ms' not in new:
+            continue
+        ratio = new['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        flag = ''
+        if ratio > threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"{key:<60} {old['median_ms']:>10.1f} {new['median_ms']:>10.1f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='asset counts')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--missing', choices=MISSING, default='random')
+    parser.add_argument('--fraction', type=float, default=0.05, help='share of data the pattern removes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=30.0, help='seconds per function and size')
+    parser.add_argument('--backend', choices=['matplotlib', 'vega'], default='matplotlib')
+    parser.add_argument('--only', nargs='+', help='run only functions whose name contains one of these')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON results to compare against')
+    parser.add_argument('--against', help='compare this JSON results file instead of running')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    if args.against:
+        with open(args.against) as f:
+            current = json.load(f)
+    else:
+        current = {'meta': metadata(args), 'results': run(args)}
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"Slower than the baseline by more than {args.threshold}x: {', '.join(regressions)}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Server cost of the two chart backends.
+
+For every chart the pages draw, times the matplotlib path (build the figure and rasterize it to
+PNG, as st.pyplot does) against the client-side path (build the Vega-Lite spec and serialize it
+to JSON, as CHART_BACKEND=vega does), and reports the payload each sends to the browser. The
+gzip column is the JSON size after compression, closer to what goes over the websocket.
+
+    DATA_PROVIDER=fixture python benchmarks/chart_backends.py --repeat 3
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'app'))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+
+def measure(func, args, repeat):
+    from figure_cache import render_bytes
+
+    best, payload = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = render_bytes(func(*args))
+        best = min(best, time.perf_counter() - started)
+    payload = payload if isinstance(payload, list) else [payload]
+    return best, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    import vega
+    from soak_figures import chart_jobs
+
+    jobs = chart_jobs()
+    print(f"{'chart':<32} {'png ms':>8} {'png KB':>8} {'vega ms':>8} {'json KB':>8} {'gzip KB':>8}")
+    totals = [0.0, 0, 0.0, 0, 0]
+    for func, job_args in jobs:
+        vega.ENABLED = False
+        png_time, pngs = measure(func, job_args, args.repeat)
+        vega.ENABLED = True
+        spec_time, specs = measure(func, job_args, args.repeat)
+        vega.ENABLED = False
+
+        row = [
+            png_time, sum(map(len, pngs)),
+            spec_time, sum(map(len, specs)), sum(len(gzip.compress(spec)) for spec in specs)
+        ]
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f'{func.__name__:<32} {row[0] * 1e3:>8.1f} {row[1] / 1024:>8.1f} '
+              f'{row[2] * 1e3:>8.1f} {row[3] / 1024:>8.1f} {row[4] / 1024:>8.1f}')
+
+    print(f"{'total':<32} {totals[0] * 1e3:>8.1f} {totals[1] / 1024:>8.1f} "
+          f'{totals[2] * 1e3:>8.1f} {totals[3] / 1024:>8.1f} {totals[4] / 1024:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Per-interaction cost of the selector-driven sections, with and without fragment reruns.
+
+The sector trend (4_Sector_analysis.py) and raw indicator (5_Economic_analysis.py) sections are
+st.fragment functions, so changing their selectbox reruns only that section. For each page this
+script changes the selection --repeat times, cycling through the options, and measures:
+  - full: the whole script reruns, as every selection change did before the fragments;
+  - fragment: only the fragment reruns, as in the browser now.
+It reports median latency, the messages sent to the browser per rerun and the charts rendered.
+
+AppTest always reruns the whole script, so the fragment reruns are driven through AppTest's
+script runner with its fragment storage kept between runs (this uses Streamlit internals).
+
+    DATA_PROVIDER=fixture python benchmarks/fragment_reruns.py --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+PAGES = ['pages/4_Sector_analysis.py', 'pages/5_Economic_analysis.py']
+
+
+def patch_runner():
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner, require_widgets_deltas
+    from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+    class FragmentRunner(LocalScriptRunner):
+        storage = MemoryFragmentStorage()
+        fragment_id = None
+        messages = 0
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._fragment_storage = FragmentRunner.storage
+
+        def run(self, widget_state=None, query_params=None, timeout=3, page_hash=''):
+            if FragmentRunner.fragment_id is None:
+                tree = super().run(widget_state, query_params, timeout, page_hash)
+            else:
+                self.request_rerun(RerunData(
+                    widget_states=widget_state,
+                    page_script_hash=page_hash,
+                    fragment_id_queue=[FragmentRunner.fragment_id],
+                    is_fragment_scoped_rerun=True
+                ))
+                if not self._script_thread:
+                    self.start()
+                require_widgets_deltas(self, timeout)
+                tree = parse_tree_from_messages(self.forward_msgs())
+            FragmentRunner.messages = len(self.forward_msgs())
+            return tree
+
+    app_test.LocalScriptRunner = FragmentRunner
+    return FragmentRunner
+
+
+def measure(page, runner, repeat, scoped):
+    from streamlit.testing.v1 import AppTest
+    from figure_cache import figure_cache
+
+    runner.fragment_id = None
+    figure_cache.clear()
+    at = AppTest.from_file(page, default_timeout=300)
+    at.run()
+    fragment_ids = list(runner.storage._fragments)
+    options = at.selectbox[0].options
+
+    times, messages, renders = [], [], []
+    for i in range(repeat):
+        runner.fragment_id = fragment_ids[0] if scoped else None
+        rendered = figure_cache.misses
+        at.selectbox[0].select(options[(i + 1) % len(options)])
+        started = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - started)
+        messages.append(runner.messages)
+        renders.append(figure_cache.misses - rendered)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    runner.fragment_id = None
+    return statistics.median(times), statistics.median(messages), sum(renders) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    os.chdir(APP_DIR)
+    runner = patch_runner()
+
+    print(f"{'page':<32} {'rerun':<9} {'median ms':>10} {'messages':>9} {'charts':>7}")
+    for page in PAGES:
+        for scoped in (False, True):
+            latency, messages, renders = measure(page, runner, args.repeat, scoped)
+            print(f"{os.path.basename(page):<32} {'fragment' if scoped else 'full':<9} "
+                  f'{latency * 1e3:>10.1f} {messages:>9.0f} {renders:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
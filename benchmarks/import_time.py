@@ -0,0 +1,93 @@
+"""Startup import time per page.
+
+Runs each page's imports in a fresh interpreter under `python -X importtime`, after importing
+streamlit itself, and reports the median time spent in the page's own import chain and which
+heavy dependencies it loaded. Pages over their budget in BUDGET_MS make the script exit with
+status 1, so a slower cold start shows up as a failure rather than going unnoticed.
+
+    python benchmarks/import_time.py --repeat 5
+    python benchmarks/import_time.py --app /path/to/other/checkout/app   # compare versions
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'matplotlib', 'seaborn', 'yfinance', 'fredapi']
+
+# Import-time budget per page, in milliseconds (beyond streamlit itself)
+BUDGET_MS = {
+    '1_Home.py': 100,
+    '2_Commodities_analysis.py': 700,
+    '3_Region_analysis.py': 700,
+    '4_Sector_analysis.py': 700,
+    '5_Economic_analysis.py': 700
+}
+
+
+# Module-level import statements of a page script
+def page_imports(path):
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(app_dir, imports):
+    code = '\n'.join([
+        'import sys, json',
+        f'sys.path.insert(0, {app_dir!r})',
+        'import streamlit',
+        *imports,
+        f'print(json.dumps([name for name in {HEAVY!r} if name in sys.modules]))'
+    ])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=app_dir, check=True
+    )
+
+    # Top-level entries after streamlit's are the page's own import chain
+    total, after_streamlit = 0, False
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('  '):
+            continue
+        if after_streamlit:
+            total += int(cumulative)
+        after_streamlit = after_streamlit or name.strip() == 'streamlit'
+    return total / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--app', default=APP_DIR, help='app directory to measure')
+    args = parser.parse_args()
+
+    pages = [os.path.join(args.app, '1_Home.py')] + sorted(glob.glob(os.path.join(args.app, 'pages', '*.py')))
+    over = []
+    print(f"{'page':<28} {'median ms':>10} {'budget':>7}  heavy modules loaded")
+    for page in pages:
+        name = os.path.basename(page)
+        imports = page_imports(page)
+        runs = [measure(args.app, imports) for _ in range(args.repeat)]
+        median = statistics.median(ms for ms, _ in runs)
+        budget = BUDGET_MS.get(name)
+        if budget is not None and median > budget:
+            over.append(name)
+        print(f"{name:<28} {median:>10.1f} {budget or '-':>7}  {', '.join(runs[-1][1]) or '-'}")
+
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Headless load test: N concurrent sessions reading every page.
+
+Each simulated session opens every page (1_Home.py and pages/*) and then keeps rerunning them
+for --rounds, changing a selectbox on each rerun the way a reader would. Data comes from the
+fixture provider, with --latency seconds added to every upstream call.
+
+Pages run through Streamlit's AppTest. AppTest swaps process-wide state (the runtime instance,
+config options) on every run, so it cannot run two scripts at once in one process. The sessions
+are therefore spread over --processes worker processes, each standing in for one server process
+with its own loader, panel and figure caches; within a process its sessions take turns, one
+rerun each, round robin. A rerun's response time is measured from when its session asked for it
+(when the session's previous rerun finished) and so includes the wait behind the other sessions
+of that process, as time-sliced script threads would see it. Service time is the rerun alone.
+
+Per page it reports p50/p95/p99 response time, median service time, the peak RSS of a worker
+process and the most figures left alive (and registered with pyplot) after a rerun. Reruns of
+the first --warmup rounds (cold caches) are left out of the percentiles.
+
+    python benchmarks/load_test.py --sessions 50 --processes 4 --rounds 3
+    python benchmarks/load_test.py --sessions 20 --latency 0.2 --output load.json
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'app')
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+PAGES = ['1_Home.py'] + sorted(os.path.relpath(page, APP_DIR) for page in glob.glob(os.path.join(APP_DIR, 'pages', '*.py')))
+
+
+# Change one selectbox of the page to another option, as a reader would between reruns
+def interact(at, rng):
+    boxes = [box for box in at.selectbox if len(box.options) > 1]
+    if boxes:
+        box = rng.choice(boxes)
+        box.select(rng.choice([option for option in box.options if option != box.value]))
+
+
+# One worker process: `sessions` sessions served one rerun at a time, round robin
+def serve(worker, sessions, args, barrier, results):
+    os.environ.setdefault('RENDER_WORKERS', '0')
+    os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+    os.environ['FIXTURE_LATENCY'] = str(args.latency)
+    # Own price store per process, so cold-cache downloads do not race on the same files
+    os.environ['PRICE_STORE_DIR'] = tempfile.mkdtemp(prefix=f'load-test-{worker}-')
+    os.chdir(APP_DIR)
+    warnings.filterwarnings('ignore')
+
+    from streamlit.testing.v1 import AppTest
+    from figures import open_figures
+    from soak_figures import rss_mb, pyplot_figures
+
+    rng = random.Random(worker)
+    # Every session visits the pages in its own order
+    visits = [[PAGES[(session + i) % len(PAGES)] for i in range(len(PAGES))] for session in sessions]
+    apps = [{} for _ in sessions]
+    records = []
+
+    # Open the entry point once first, as the server does: if a page under pages/ is the first
+    # script AppTest runs in a process, the app's page list is never registered and
+    # st.page_link on the home page fails
+    AppTest.from_file(PAGES[0], default_timeout=args.timeout).run()
+
+    barrier.wait()
+    started = time.perf_counter()
+    asked = [started] * len(sessions)
+    for round_ in range(args.rounds):
+        for step in range(len(PAGES)):
+            for s, session in enumerate(sessions):
+                page = visits[s][step]
+                at = apps[s].get(page)
+                begun = time.perf_counter()
+                if at is None:
+                    at = apps[s][page] = AppTest.from_file(page, default_timeout=args.timeout)
+                else:
+                    interact(at, rng)
+                error = None
+                try:
+                    at.run()
+                    if at.exception:
+                        error = str(at.exception[0].message)
+                except Exception as e:
+                    error = f'{type(e).__name__}: {e}'
+                done = time.perf_counter()
+                records.append({
+                    'worker': worker,
+                    'session': session,
+                    'round': round_,
+                    'page': page,
+                    'response_ms': (done - asked[s]) * 1e3,
+                    'service_ms': (done - begun) * 1e3,
+                    'rss_mb': rss_mb(),
+                    'open_figures': open_figures(),
+                    'pyplot_figures': pyplot_figures(),
+                    'error': error
+                })
+                asked[s] = done
+    results.put((worker, time.perf_counter() - started, records))
+
+
+def summarize(records, warmup):
+    pages = {}
+    for record in records:
+        pages.setdefault(record['page'], []).append(record)
+
+    summary = {}
+    for page in PAGES:
+        page_records = pages.get(page, [])
+        steady = [record for record in page_records if record['round'] >= warmup] or page_records
+        response = [record['response_ms'] for record in steady]
+        p50, p95, p99 = np.percentile(response, [50, 95, 99]) if response else (float('nan'),) * 3
+        summary[page] = {
+            'reruns': len(steady),
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1),
+            'service_p50_ms': round(float(np.median([record['service_ms'] for record in steady])), 1),
+            'peak_rss_mb': round(max(record['rss_mb'] for record in page_records), 1),
+            'max_open_figures': max(record['open_figures'] for record in page_records),
+            'max_pyplot_figures': max(record['pyplot_figures'] for record in page_records),
+            'errors': sum(record['error'] is not None for record in page_records)
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rounds', type=int, default=3, help='passes of every session over every page')
+    parser.add_argument('--warmup', type=int, default=1, help='rounds left out of the percentiles')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each upstream call')
+    parser.add_argument('--timeout', type=float, default=300.0, help='seconds allowed per rerun')
+    parser.add_argument('--output', help='write the summary and every rerun to this JSON file')
+    args = parser.parse_args()
+
+    processes = max(1, min(args.processes, args.sessions))
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=serve, args=(i, list(range(i, args.sessions, processes)), args, barrier, results))
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    # Drain the queue before joining: a worker exits only once its records are consumed
+    finished = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    records = [record for _, _, worker_records in finished for record in worker_records]
+    wall = max(seconds for _, seconds, _ in finished)
+    summary = summarize(records, args.warmup)
+
+    print(f'{args.sessions} sessions on {processes} processes, {args.rounds} rounds, '
+          f'{len(records)} reruns in {wall:.1f} s ({len(records) / wall:.1f} reruns/s)')
+    print(f"{'page':<32} {'reruns':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'svc ms':>8} "
+          f"{'rss MB':>7} {'figs':>5} {'pyplot':>6} {'errors':>6}")
+    for page, row in summary.items():
+        print(f"{os.path.basename(page):<32} {row['reruns']:>6} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} "
+              f"{row['p99_ms']:>8.0f} {row['service_p50_ms']:>8.0f} {row['peak_rss_mb']:>7.0f} "
+              f"{row['max_open_figures']:>5} {row['max_pyplot_figures']:>6} {row['errors']:>6}")
+
+    errors = sorted({record['error'] for record in records if record['error']})
+    for error in errors[:10]:
+        print(f'  error: {error}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'wall_seconds': wall, 'summary': summary, 'reruns': records}, f, indent=2)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark for parallel chart rendering.
+
+Renders the multi-chart workloads (the Region page's three charts, and the ten price and ten
+moving-average charts of the commodities) in this process one after another, then through the
+render_service process pool, and reports wall time for each next to the slowest single chart.
+The pool's workers are started and warmed up before timing. The speedup is bounded by the
+number of cores, so run it on a machine with at least as many cores as --workers.
+
+Then it renders the Region page through Streamlit's AppTest with the same number of workers,
+since under Streamlit the page is the __main__ module the workers are spawned from; it exits
+with status 1 if the page raises or its charts did not go through the pool.
+
+    DATA_PROVIDER=fixture python benchmarks/render_parallel.py --workers 4 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+
+def workloads():
+    import commodities
+    import region_data
+
+    panel = region_data.get_region_panel()
+    analytics = region_data.prepare_data(panel)
+    region = [
+        (region_data.normalized_performance, (analytics,), {}),
+        (region_data.annualized_volatility, (analytics,), {}),
+        (region_data.correlation_matrix, (analytics,), {}),
+    ]
+
+    panel = commodities.get_commodity_panel()
+    prices = [(commodities.price_chart, (panel, name), {}) for name in panel.assets]
+    averages = [(commodities.moving_average_chart, (panel, name), {}) for name in panel.assets]
+    return {'region': region, 'commodity prices': prices, 'commodity moving averages': averages}
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+# The Region page run as Streamlit runs it, rendering through a pool of `workers` processes
+def apptest(workers):
+    from streamlit.testing.v1 import AppTest
+    import render_service
+    from figure_cache import figure_cache
+
+    # Fresh workers, spawned while the page is running
+    if render_service._pool is not None:
+        render_service._drop_pool(render_service._pool)
+    figure_cache.clear()
+    # Also in the environment, so workers see the server's setting
+    os.environ['RENDER_WORKERS'] = str(workers)
+    render_service.RENDER_WORKERS = workers
+    page = AppTest.from_file(os.path.join(APP_DIR, 'pages', '3_Region_analysis.py'), default_timeout=300)
+    started = time.perf_counter()
+    page.run()
+    seconds = time.perf_counter() - started
+    failed = [f'page raised {e.value}' for e in page.exception]
+    if render_service._pool is None:
+        failed.append('rendered without the pool')
+    print(f"{'Region page (AppTest)':<28} {seconds:>6.2f} s  {'ok' if not failed else 'FAILED: ' + '; '.join(failed)}")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    from render_service import render_all
+
+    jobs = workloads()
+    # Start the workers and let them import the chart modules and map the data
+    for batch in jobs.values():
+        render_all(batch * args.workers, workers=args.workers)
+
+    print(f'{os.cpu_count()} CPUs, {args.workers} workers, best of {args.repeat}')
+    print(f"{'workload':<28} {'charts':>6} {'slowest':>8} {'serial':>8} {'pool':>8} {'speedup':>8}")
+    for name, batch in jobs.items():
+        slowest = max(best_of(args.repeat, lambda job=job: render_all([job], workers=0)) for job in batch)
+        serial = best_of(args.repeat, lambda: render_all(batch, workers=0))
+        pooled = best_of(args.repeat, lambda: render_all(batch, workers=args.workers))
+        print(f'{name:<28} {len(batch):>6} {slowest:>8.2f} {serial:>8.2f} {pooled:>8.2f} {serial / pooled:>7.2f}x')
+
+    sys.exit(0 if apptest(args.workers) else 1)
+
+
+if __name__ == '__main__':
+    main()
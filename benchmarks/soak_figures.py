@@ -0,0 +1,140 @@
+"""Soak test for chart rendering.
+
+Renders every chart of every page from several concurrent threads (one per simulated session)
+for a number of rounds, the way a page hands a figure to st.pyplot and releases it. After each
+round it reports the process RSS, the figures still alive and the figures registered with pyplot.
+Under a steady load the figure counts should return to zero and RSS should level off after the
+first rounds.
+
+Streamlit runs each script rerun on a new thread, and glibc gives new threads their own malloc
+arenas, which shows up as RSS creep unrelated to figures. Cap the arenas as in deployment:
+
+    MALLOC_ARENA_MAX=2 DATA_PROVIDER=fixture python benchmarks/soak_figures.py --sessions 4 --rounds 20
+"""
+import argparse
+import gc
+import io
+import os
+import resource
+import sys
+import threading
+import time
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+
+
+def rss_mb():
+    # Current RSS on Linux; peak RSS elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def pyplot_figures():
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    return len(pyplot.get_fignums()) if pyplot else 0
+
+
+# Every chart the pages draw, as (function, args) jobs
+def chart_jobs():
+    import commodities
+    import region_data
+    import sector_data
+    import economic_conditions
+
+    jobs = []
+    panel = commodities.get_commodity_panel()
+    analytics = commodities.prepare_data(panel)
+    jobs += [
+        (commodities.commodity_correlation, (analytics,)),
+        (commodities.plot_normalized, (analytics,)),
+        (commodities.plot_price, (panel,)),
+        (commodities.plot_moving_averages, (panel,)),
+    ]
+
+    panel = region_data.get_region_panel()
+    analytics = region_data.prepare_data(panel)
+    last = analytics.rolling_correlation(60).dates[-1]
+    jobs += [
+        (region_data.normalized_performance, (analytics,)),
+        (region_data.annualized_volatility, (analytics,)),
+        (region_data.correlation_matrix, (analytics,)),
+        (region_data.average_rolling_correlation, (analytics, last)),
+        (region_data.rolling_correlation_heatmap, (analytics, last)),
+        (region_data.price_trends, (analytics, panel.assets[0])),
+    ]
+
+    panel = sector_data.get_sector_panel()
+    analytics = sector_data.prepare_data(panel)
+    jobs += [
+        (sector_data.cumulative_sector_performance, (analytics,)),
+        (sector_data.volatility, (analytics,)),
+        (sector_data.trend_analysis, (panel, panel.assets[0])),
+    ]
+
+    data = economic_conditions.get_economic_snapshot()
+    jobs += [
+        (economic_conditions.economic_indicators_raw, (data, data.columns[0])),
+        (economic_conditions.economic_indicators_normalized, (data,)),
+    ]
+    return jobs
+
+
+def run_session(jobs, errors):
+    from figure_cache import SAVEFIG
+    from figures import release
+
+    for func, args in jobs:
+        try:
+            figs = func(*args)
+            for fig in figs if isinstance(figs, list) else [figs]:
+                fig.savefig(io.BytesIO(), format='png', **SAVEFIG)
+                release(fig)
+        except Exception as error:
+            errors.append((func.__name__, error))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=4, help='concurrent sessions per round')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed RSS growth from the second to the last round')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    from figures import open_figures
+
+    jobs = chart_jobs()
+    samples = []
+    print(f"{'round':>5} {'seconds':>8} {'rss_mb':>8} {'open':>5} {'pyplot':>6}")
+    for i in range(args.rounds):
+        errors = []
+        started = time.perf_counter()
+        threads = [threading.Thread(target=run_session, args=(jobs, errors)) for _ in range(args.sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+
+        samples.append(rss_mb())
+        print(f'{i + 1:>5} {time.perf_counter() - started:>8.2f} {samples[-1]:>8.1f} '
+              f'{open_figures():>5} {pyplot_figures():>6}')
+        for name, error in errors:
+            print(f'  {name}: {error!r}')
+
+    growth = (samples[-1] - samples[min(1, len(samples) - 1)]) / samples[0]
+    leaked = open_figures() or pyplot_figures()
+    print(f'RSS growth after warm-up: {growth:+.1%}, figures left open: {leaked}')
+    sys.exit(1 if leaked or growth > args.tolerance else 0)
+
+
+if __name__ == '__main__':
+    main()
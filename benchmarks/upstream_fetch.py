@@ -0,0 +1,239 @@
+"""Checks of the upstream fetch layer (app/fetch.py) against the fixture provider as a stub.
+
+The stub adds --latency seconds to every call and fails --errors of the calls. Scenarios:
+  coalesce     --sessions threads ask for the same tickers at once (half of them for a batch
+               shifted by a few tickers); each ticker should be downloaded once
+  cap          --sessions threads each fetch their own FRED series; no more than
+               FETCH_CONCURRENCY calls should be in flight at any time
+  retry        the same with failures injected; calls are retried with jittered backoff and
+               only requests whose every attempt failed should fail
+  bug          the same with a provider that raises a programming error; it should be raised
+               at once, without retries
+  loaders      --sessions threads open the four datasets on cold caches, as sessions hitting a
+               freshly started server do; upstream calls should not grow with the sessions
+  live         --sessions threads download their own tickers through LiveProvider, against a
+               yfinance stub that keeps results in shared module globals the way yf.download
+               does; every session should get its own tickers' bars, a ticker the stub
+               fails should come back as that symbol's error, and a batch that fails as a
+               whole should raise
+For each it prints the fetch counters and exits with status 1 if an expectation does not hold.
+
+    python benchmarks/upstream_fetch.py --sessions 20 --latency 0.2 --errors 0.3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+os.environ.setdefault('DATA_PROVIDER', 'fixture')
+os.environ.setdefault('PRICE_STORE_DIR', tempfile.mkdtemp(prefix='upstream-fetch-'))
+# Short backoff so the retry scenario finishes quickly
+os.environ.setdefault('FETCH_BACKOFF', '0.05')
+
+START, END = '2024-01-01', '2025-01-01'
+
+
+def in_threads(n, target):
+    errors = []
+
+    def run(i):
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+def coalesce(provider, sessions):
+    from fetch import fetch_prices
+    from providers import synthetic_universe
+
+    symbols = list(synthetic_universe(12).values())
+    batches = [symbols[:10], symbols[2:]]
+    return in_threads(sessions, lambda i: fetch_prices(provider, batches[i % 2], START, END))
+
+
+def cap(provider, sessions):
+    from fetch import fetch_series
+
+    return in_threads(sessions, lambda i: fetch_series(provider, f'SERIES{i}', START, END))
+
+
+# A provider whose FRED calls hit a bug rather than the network
+class BuggyProvider:
+    name = 'buggy'
+
+    def fred_series(self, series_id, start, end):
+        raise KeyError(series_id)
+
+
+def loaders(sessions):
+    import commodities
+    import region_data
+    import sector_data
+    import economic_conditions
+
+    datasets = [commodities.get_commodities, region_data.get_region_performance,
+                sector_data.get_sector_performance, economic_conditions.get_economic_snapshot]
+    for loader in datasets:
+        loader.clear()
+    return in_threads(sessions, lambda i: [loader() for loader in datasets[i % 4:] + datasets[:i % 4]])
+
+
+# Stand-in for the yfinance module: download() resets the shared result globals, fills them
+# from one thread per ticker and polls until every ticker is in, as yfinance/multi.py does.
+# Each ticker's bars close at its number, so bars that went to the wrong caller show up.
+# Tickers starting with BAD fail; like yfinance, the stub records their error instead of raising.
+def yfinance_stub(latency):
+    import pandas as pd
+
+    shared = types.SimpleNamespace(_DFS={}, _ERRORS={}, _TRACEBACKS={})
+
+    def download_one(ticker, start, end):
+        time.sleep(latency)
+        if ticker.startswith('BAD'):
+            shared._ERRORS[ticker] = repr(RuntimeError(f'${ticker}: possibly delisted; no timezone found'))
+            shared._DFS[ticker] = pd.DataFrame()
+            return
+        dates = pd.bdate_range(start, end, inclusive='left', name='Date')
+        close = float(ticker[-4:])
+        shared._DFS[ticker] = pd.DataFrame(
+            {'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 0.0}, index=dates)
+
+    def download(tickers, start=None, end=None, deadline=5.0, **kwargs):
+        tickers = list({ticker.upper() for ticker in tickers})
+        shared._DFS, shared._ERRORS, shared._TRACEBACKS = {}, {}, {}
+        for ticker in tickers:
+            threading.Thread(target=download_one, args=(ticker, start, end)).start()
+        started = time.perf_counter()
+        while len(shared._DFS) < len(tickers):
+            if time.perf_counter() - started > deadline:
+                raise TimeoutError('gave up polling for the shared results')
+            time.sleep(0.01)
+        return pd.concat(shared._DFS.values(), axis=1, sort=True, keys=shared._DFS.keys(),
+                         names=['Ticker', 'Price'])
+
+    return types.SimpleNamespace(download=download, shared=shared)
+
+
+def live(sessions, latency):
+    from fetch import fetch_prices
+    from providers import LiveProvider, UpstreamError, synthetic_universe
+
+    provider = LiveProvider()
+    symbols = list(synthetic_universe(sessions * 3).values())
+    mixed, unreported = [], []
+
+    def session(i):
+        batch = symbols[i * 3:i * 3 + 3]
+        frames = fetch_prices(provider, batch + [f'BAD{i:04d}'], START, END)
+        for symbol in batch:
+            df = frames.get(symbol)
+            if isinstance(df, Exception) or df is None or df.empty or (df['Close'] != float(symbol[-4:])).any():
+                mixed.append(symbol)
+        if not isinstance(frames[f'BAD{i:04d}'], UpstreamError):
+            unreported.append(f'BAD{i:04d}')
+
+    def failed_batch():
+        try:
+            fetch_prices(provider, ['BADX0001', 'BADX0002'], START, END)
+        except UpstreamError:
+            return
+        unreported.append('BADX batch')
+
+    real = sys.modules.get('yfinance')
+    sys.modules['yfinance'] = yfinance_stub(latency)
+    try:
+        seconds, errors = in_threads(sessions, session)
+        failed_batch()
+    finally:
+        if real is None:
+            sys.modules.pop('yfinance')
+        else:
+            sys.modules['yfinance'] = real
+    return seconds, errors, mixed, unreported
+
+
+def report(name, seconds, errors, checks):
+    from fetch import stats
+
+    counts = stats.snapshot()
+    failed = [label for label, ok in checks(counts) if not ok]
+    print(f"{name:<9} {seconds:>6.2f} s  requests {counts['requests']:>4}  coalesced {counts['coalesced']:>4}  "
+          f"calls {counts['calls']:>4}  retries {counts['retries']:>3}  failures {counts['failures']:>3}  "
+          f"peak {counts['peak']:>2}  errors {len(errors):>3}  {'ok' if not failed else 'FAILED: ' + '; '.join(failed)}")
+    stats.reset()
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--errors', type=float, default=0.3, help='share of upstream calls that fail')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    from fetch import FETCH_CONCURRENCY, FETCH_ATTEMPTS
+    from providers import FixtureProvider, set_provider
+
+    ok = True
+    provider = FixtureProvider(latency=args.latency)
+
+    seconds, errors = coalesce(provider, args.sessions)
+    ok &= report('coalesce', seconds, errors, lambda c: [
+        ('no errors', not errors),
+        ('at most two downloads', c['calls'] <= 2),
+        ('every request served', c['requests'] == args.sessions * 10),
+    ])
+
+    seconds, errors = cap(provider, args.sessions)
+    ok &= report('cap', seconds, errors, lambda c: [
+        ('no errors', not errors),
+        (f'peak <= {FETCH_CONCURRENCY}', c['peak'] <= FETCH_CONCURRENCY),
+    ])
+
+    seconds, errors = cap(FixtureProvider(latency=args.latency, errors=args.errors, seed=1), args.sessions)
+    ok &= report('retry', seconds, errors, lambda c: [
+        ('failed requests are the exhausted ones', len(errors) == c['failures']),
+        (f'at most {FETCH_ATTEMPTS} calls per request', c['calls'] <= FETCH_ATTEMPTS * args.sessions),
+        (f'peak <= {FETCH_CONCURRENCY}', c['peak'] <= FETCH_CONCURRENCY),
+    ])
+
+    seconds, errors = cap(BuggyProvider(), args.sessions)
+    ok &= report('bug', seconds, errors, lambda c: [
+        ('every request failed', len(errors) == args.sessions),
+        ('no retries', c['retries'] == 0 and c['calls'] == args.sessions),
+    ])
+
+    set_provider(FixtureProvider(latency=args.latency))
+    seconds, errors = loaders(args.sessions)
+    ok &= report('loaders', seconds, errors, lambda c: [
+        ('no errors', not errors),
+        ('one call per dataset batch or series', c['calls'] <= 3 + 9),
+    ])
+
+    seconds, errors, mixed, unreported = live(args.sessions, args.latency)
+    ok &= report('live', seconds, errors, lambda c: [
+        ('no errors', not errors),
+        ('every session got its own bars', not mixed),
+        ('failed tickers reported', not unreported),
+    ])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()